@@ -6,4 +6,9 @@ from .models import Act
 class ActFilter(filters.FilterSet):
     class Meta:
         model = Act
-        fields = ('removed_from_source', 'issuer')
+        fields = (
+            'forwarded',
+            'removed_from_source',
+            'needs_inspection',
+            'issuer',
+        )
@@ -0,0 +1,105 @@
+"""Show the plans of the async service's hot queries with and without the
+partial indexes on a generated set of acts.
+
+Everything happens in a transaction which is rolled back in the end, so the
+command is safe to run against a real database.
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from acts.models import Act, Document
+from acts.views import ActToForwardViewSet
+
+
+class Command(BaseCommand):
+    help = __doc__
+
+    INDEXES = (
+        (Act, 'act_pending_forward'),
+        (Document, 'document_without_file'),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--acts', type=int, default=100_000)
+        parser.add_argument('--issuer', default='Sumy')
+        parser.add_argument(
+            '--pending-every',
+            type=int,
+            default=100,
+            help='Every N-th act is not forwarded, every next one also '
+                 'misses a file',
+        )
+
+    def _seed(self, acts: int, issuer: str, pending_every: int) -> None:
+        self.stdout.write(f'Creating {acts} acts with 2 documents each')
+        batch_size = 5000
+        for start in range(0, acts, batch_size):
+            created = Act.objects.bulk_create(
+                Act(
+                    issuer=issuer,
+                    act_id=f'explain-{i}',
+                    title='Explain',
+                    forwarded=i % pending_every > 1,
+                )
+                for i in range(start, min(start + batch_size, acts))
+            )
+            Document.objects.bulk_create(
+                Document(
+                    act=act,
+                    order=order,
+                    url=f'https://example.com/{act.act_id}-{order}',
+                    file='' if i % pending_every == 1 and order else 'f',
+                )
+                for i, act in enumerate(created, start)
+                for order in range(2)
+            )
+
+        with connection.cursor() as cursor:
+            # Indexes can't be changed while the FK checks are pending
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(f'ANALYZE {Act._meta.db_table}')
+            cursor.execute(f'ANALYZE {Document._meta.db_table}')
+
+    def _explain(self, title: str, issuer: str) -> None:
+        queries = {
+            'Documents to download': Document.objects.filter(
+                file='',
+                act__removed_from_source=False,
+                act__issuer=issuer,
+            ),
+            'Acts to forward': ActToForwardViewSet.queryset.filter(
+                issuer=issuer,
+            ),
+        }
+
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_LABEL(name))
+            self.stdout.write(queryset.explain(analyze=True))
+            self.stdout.write('')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        issuer = options['issuer']
+        self._seed(options['acts'], issuer, options['pending_every'])
+
+        indexes = [
+            (model, index)
+            for model, name in self.INDEXES
+            for index in model._meta.indexes
+            if index.name == name
+        ]
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for model, index in indexes:
+                schema_editor.remove_index(model, index)
+        self._explain('Without the partial indexes', issuer)
+
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for model, index in indexes:
+                schema_editor.add_index(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Act._meta.db_table}')
+            cursor.execute(f'ANALYZE {Document._meta.db_table}')
+        self._explain('With the partial indexes', issuer)
+
+        transaction.set_rollback(True)
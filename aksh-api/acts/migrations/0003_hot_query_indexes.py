@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acts', '0002_document_etag_sha256'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='act',
+            index=models.Index(condition=models.Q(('forwarded', False), ('needs_inspection', False), ('removed_from_source', False)), fields=['issuer', 'id'], name='act_pending_forward'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(condition=models.Q(('file', '')), fields=['act'], name='document_without_file'),
+        ),
+    ]
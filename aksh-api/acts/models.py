@@ -1,5 +1,9 @@
-from django.db import models
+# noinspection PyPep8Naming
+import typing as T
+
+from django.db import models, transaction
 from django.contrib.postgres.fields import ArrayField
+from django.utils import timezone
 
 from core.models import DatedModel
 
@@ -37,9 +41,100 @@ def _document__file__upload_to(document: 'Document', filename: str) -> str:
     return f'acts/{document.act.issuer}/{filename}'
 
 
+class ActManager(models.Manager):
+    @transaction.atomic
+    def bulk_create_with_documents(
+            self,
+            acts_data: T.Iterable[T.Mapping[str, T.Any]],
+    ) -> T.List['Act']:
+        """Create acts with their nested documents in two INSERTs."""
+        acts, documents_data = [], []
+        for data in acts_data:
+            data = dict(data)
+            documents_data.append(data.pop('documents', ()))
+            acts.append(self.model(**data))
+
+        acts = self.bulk_create(acts)
+        Document.objects.bulk_create(
+            Document(act=act, **document)
+            for act, documents in zip(acts, documents_data)
+            for document in documents
+        )
+
+        return acts
+
+    @transaction.atomic
+    def sync(
+            self,
+            issuer: str,
+            acts_data: T.Iterable[T.Mapping[str, T.Any]],
+            partial: bool = False,
+    ) -> T.Dict[str, int]:
+        """Make the stored acts of the `issuer` match the parsed ones.
+
+        New acts are created, the missing ones are marked as removed from
+        the source and the reappeared ones are unmarked. A `partial` sync
+        gets only some of the acts, so it doesn't mark the missing ones.
+        """
+        acts_data = {data['act_id']: data for data in acts_data}
+        stored = {
+            act_id: (pk, removed_from_source)
+            for act_id, pk, removed_from_source in self.filter(
+                issuer=issuer,
+            ).values_list('act_id', 'pk', 'removed_from_source')
+        }
+
+        new = [
+            {**data, 'issuer': issuer}
+            for act_id, data in acts_data.items()
+            if act_id not in stored
+        ]
+        removed = [] if partial else [
+            pk
+            for act_id, (pk, removed_from_source) in stored.items()
+            if act_id not in acts_data and not removed_from_source
+        ]
+        restored = [
+            pk
+            for act_id, (pk, removed_from_source) in stored.items()
+            if act_id in acts_data and removed_from_source
+        ]
+
+        self.bulk_create_with_documents(new)
+        # `update` skips the `auto_now` fields, so set `updated` explicitly
+        now = timezone.now()
+        self.filter(pk__in=removed).update(
+            removed_from_source=True,
+            updated=now,
+        )
+        self.filter(pk__in=restored).update(
+            removed_from_source=False,
+            updated=now,
+        )
+
+        return {
+            'created': len(new),
+            'removed': len(removed),
+            'restored': len(restored),
+            'unchanged': len(acts_data) - len(new) - len(restored),
+        }
+
+
 class Act(DatedModel):
     class Meta:
         unique_together = (('issuer', 'act_id'),)
+        indexes = (
+            # The acts-to-forward list, only a tiny part of all the acts
+            models.Index(
+                fields=('issuer', 'id'),
+                name='act_pending_forward',
+                condition=models.Q(
+                    forwarded=False,
+                    removed_from_source=False,
+                    needs_inspection=False,
+                ),
+            ),
+        )
 
     issuer = models.TextField(choices=ACT_ISSUERS)
     act_id = models.TextField()
@@ -52,11 +147,23 @@ class Act(DatedModel):
     needs_inspection = models.BooleanField(default=False)
     comments = models.TextField(null=True, blank=True)
 
+    objects = ActManager()
+
     def __str__(self):
         return f'{self.get_issuer_display()}: {self.act_id}: {self.title}'
 
 
 class Document(DatedModel):
+    class Meta:
+        indexes = (
+            # The documents still to download
+            models.Index(
+                fields=('act',),
+                name='document_without_file',
+                condition=models.Q(file=''),
+            ),
+        )
+
     act = models.ForeignKey(Act, models.CASCADE, related_name='documents')
     order = models.PositiveSmallIntegerField()
     url = models.TextField()
@@ -67,6 +174,14 @@ class Document(DatedModel):
         upload_to=_document__file__upload_to,
     )
     last_modified = models.DateTimeField(null=True, blank=True)
+    etag = models.TextField(null=True, blank=True)
+    # SHA-256 of the file content, documents with equal files share them
+    sha256 = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        db_index=True,
+    )
 
     def __str__(self):
         return self.url
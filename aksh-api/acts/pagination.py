@@ -0,0 +1,8 @@
+from rest_framework import pagination
+
+
+class IdCursorPagination(pagination.CursorPagination):
+    ordering = 'id'
+    page_size = 500
+    page_size_query_param = 'page_size'
+    max_page_size = 5000
@@ -1,21 +1,64 @@
+import os
 # noinspection PyPep8Naming
 import typing as T
 
+from django.conf import settings
 from rest_framework import serializers
 
-from .models import Act, Document
+from .models import ACT_ISSUERS, Act, Document
+
+
+def requested_fields(request) -> T.Optional[T.Set[str]]:
+    """Return the fields listed in the `fields` query param, if any."""
+    if request is None or request.method != 'GET':
+        return None
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return set(fields.split(','))
+
+
+class FieldsProjectionMixin:
+    """Serialize only the fields requested with `?fields=id,act_id`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'))
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
 
 
 class InlineDocumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Document
-        fields = ('order', 'url', 'last_modified')
+        fields = (
+            'id',
+            'order',
+            'url',
+            'file',
+            'last_modified',
+            'etag',
+            'sha256',
+        )
+        read_only_fields = ('id', 'file', 'etag', 'sha256')
+        # The files are referred by their path in the media directory
+        extra_kwargs = {'file': {'use_url': False}}
+
+
+class ActListSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        acts = Act.objects.bulk_create_with_documents(validated_data)
+        return Act.objects.filter(
+            pk__in=[act.pk for act in acts],
+        ).prefetch_related('documents')
 
 
-class ActSerializer(serializers.ModelSerializer):
+class ActSerializer(FieldsProjectionMixin, serializers.ModelSerializer):
     class Meta:
         model = Act
         fields = '__all__'
+        list_serializer_class = ActListSerializer
 
     documents = InlineDocumentSerializer(many=True)
 
@@ -28,10 +71,96 @@ class ActSerializer(serializers.ModelSerializer):
         return act
 
 
-class DocumentSerializer(serializers.ModelSerializer):
+class SyncedActSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Act
+        fields = ('act_id', 'title', 'documents')
+
+    documents = InlineDocumentSerializer(many=True)
+
+
+class ActsSyncSerializer(serializers.Serializer):
+    issuer = serializers.ChoiceField(choices=ACT_ISSUERS)
+    # Every act currently published by the issuer, unless `partial`
+    acts = SyncedActSerializer(many=True)
+    # Only some of the acts are sent, so the missing ones aren't removed
+    partial = serializers.BooleanField(default=False)
+
+
+class ActBulkUpdateSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+    )
+    forwarded = serializers.BooleanField(required=False)
+    removed_from_source = serializers.BooleanField(required=False)
+    needs_inspection = serializers.BooleanField(required=False)
+
+
+class DocumentSerializer(FieldsProjectionMixin, serializers.ModelSerializer):
     class Meta:
         model = Document
         fields = '__all__'
+        extra_kwargs = {'file': {'use_url': False}}
+
+    # A file already written to `MEDIA_STAGING_DIR`, which is moved into
+    # place instead of being uploaded
+    staged_file = serializers.CharField(write_only=True, required=False)
+    file_name = serializers.CharField(write_only=True, required=False)
+
+    @staticmethod
+    def validate_staged_file(value: str) -> str:
+        path = os.path.normpath(value)
+        if os.path.dirname(path) != settings.MEDIA_STAGING_DIR:
+            error_text = f'Staged files must be in {settings.MEDIA_STAGING_DIR}'
+            raise serializers.ValidationError(error_text)
+        if not Document.file.field.storage.exists(path):
+            raise serializers.ValidationError(f'{path} does not exist')
+
+        return path
+
+    def update(self, instance, validated_data):
+        staged_file = validated_data.pop('staged_file', None)
+        file_name = validated_data.pop('file_name', None)
+        if staged_file is not None:
+            validated_data['file'] = self._store_staged_file(
+                instance,
+                staged_file,
+                file_name or os.path.basename(staged_file),
+                validated_data.get('sha256'),
+            )
+
+        return super().update(instance, validated_data)
+
+    @staticmethod
+    def _store_staged_file(
+            document: Document,
+            staged_file: str,
+            file_name: str,
+            sha256: T.Optional[str],
+    ) -> str:
+        field = Document.file.field
+        storage = field.storage
+
+        # Reuse the file of any document with the same content
+        if sha256 is not None:
+            duplicate = Document.objects.filter(
+                sha256=sha256,
+                file__gt='',
+            ).values_list('file', flat=True).first()
+            if duplicate is not None and storage.exists(duplicate):
+                storage.delete(staged_file)
+                return duplicate
+
+        name = field.generate_filename(document, file_name)
+        name = storage.get_available_name(name, max_length=field.max_length)
+
+        path = storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Both paths are on the same volume, so this is a cheap rename
+        os.replace(storage.path(staged_file), path)
+
+        return name
 
 
 class ActToForwardSerializer(serializers.ModelSerializer):
@@ -51,12 +180,16 @@ class ActToForwardSerializer(serializers.ModelSerializer):
     files = serializers.SerializerMethodField()
 
     @staticmethod
-    def get_file_name(act: Act) -> str:
-        return act.documents.get(order=0).file.name.rsplit('/', 1)[-1]
+    def _main_document(act: Act) -> Document:
+        # The documents are prefetched ordered by `order`, the main one
+        # goes first
+        return act.documents.all()[0]
 
-    @staticmethod
-    def get_link(act: Act) -> str:
-        return act.documents.get(order=0).url
+    def get_file_name(self, act: Act) -> str:
+        return self._main_document(act).file.name.rsplit('/', 1)[-1]
+
+    def get_link(self, act: Act) -> str:
+        return self._main_document(act).url
 
     @staticmethod
     def get_files(act: Act) -> T.List[str]:
@@ -1,3 +1,383 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from .models import Act, Document
+
+
+class ActToForwardTestCase(TestCase):
+    URL = '/acts/acts-to-forward/'
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            act = Act.objects.create(issuer='Sumy', act_id=str(i), title='T')
+            for order in range(2):
+                Document.objects.create(
+                    act=act,
+                    order=order,
+                    url=f'https://smr.gov.ua/{i}-{order}.pdf',
+                    file=f'acts/Sumy/{i}-{order}.pdf',
+                )
+
+        # Not downloaded yet
+        act = Act.objects.create(issuer='Sumy', act_id='missing', title='T')
+        Document.objects.create(act=act, order=0, url='u', file='')
+
+    def test_queries_count(self):
+        # One query for the acts and one for all their documents
+        with self.assertNumQueries(2):
+            response = self.client.get(self.URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+
+    def test_data(self):
+        response = self.client.get(self.URL)
+
+        act = response.json()[0]
+        act_id = Act.objects.get(pk=act['id']).act_id
+        self.assertEqual(act['link'], f'https://smr.gov.ua/{act_id}-0.pdf')
+        self.assertEqual(act['file_name'], f'{act_id}-0.pdf')
+        self.assertEqual(act['files'], [
+            f'acts/Sumy/{act_id}-0.pdf',
+            f'acts/Sumy/{act_id}-1.pdf',
+        ])
+
+
+class ActsListTestCase(TestCase):
+    URL = '/acts/acts/'
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            act = Act.objects.create(issuer='Sumy', act_id=str(i), title='T')
+            Document.objects.create(act=act, order=0, url=f'u{i}')
+
+    def test_pages(self):
+        ids = []
+        url = f'{self.URL}?page_size=2'
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json()['results']), 2)
+            ids += [act['id'] for act in response.json()['results']]
+            url = response.json()['next']
+
+        self.assertEqual(
+            ids,
+            list(Act.objects.order_by('id').values_list('id', flat=True)),
+        )
+
+    def test_fields(self):
+        # No query for the documents which aren't requested
+        with self.assertNumQueries(1):
+            response = self.client.get(self.URL, {'fields': 'id,act_id'})
+
+        self.assertEqual(response.status_code, 200)
+        for act in response.json()['results']:
+            self.assertEqual(set(act), {'id', 'act_id'})
+
+
+class ActsCountTestCase(TestCase):
+    URL = '/acts/acts/count/'
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            Act.objects.create(issuer='Sumy', act_id=str(i), title='T')
+        Act.objects.create(issuer='Dnipro', act_id='0', title='T')
+        Act.objects.filter(act_id='1').update(forwarded=True)
+
+    def test_count(self):
+        # A single query, whatever the amount of acts
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.URL,
+                {'issuer': 'Sumy', 'forwarded': 'false'},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'count': 2})
+
+    def test_all(self):
+        response = self.client.get(self.URL)
+
+        self.assertEqual(response.json(), {'count': 4})
+
+
+class ActsSyncTestCase(TestCase):
+    URL = '/acts/acts/sync/'
+
+    @staticmethod
+    def act(act_id):
+        return {
+            'act_id': act_id,
+            'title': 'T',
+            'documents': [{'order': 0, 'url': f'https://smr.gov.ua/{act_id}'}],
+        }
+
+    def sync(self, *act_ids, partial=False):
+        data = {
+            'issuer': 'Sumy',
+            'acts': [self.act(i) for i in act_ids],
+            'partial': partial,
+        }
+        response = self.client.post(
+            self.URL,
+            data,
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_sync(self):
+        self.assertEqual(self.sync('1', '2', '3'), {
+            'created': 3, 'removed': 0, 'restored': 0, 'unchanged': 0,
+        })
+        self.assertEqual(self.sync('1', '2', '4'), {
+            'created': 1, 'removed': 1, 'restored': 0, 'unchanged': 2,
+        })
+        self.assertEqual(self.sync('1', '3', '4'), {
+            'created': 0, 'removed': 1, 'restored': 1, 'unchanged': 2,
+        })
+
+        removed = Act.objects.filter(removed_from_source=True)
+        self.assertEqual(list(removed.values_list('act_id', flat=True)), ['2'])
+        self.assertEqual(Document.objects.count(), 4)
+
+    def test_partial_sync(self):
+        self.sync('1', '2')
+        Act.objects.filter(act_id='1').update(removed_from_source=True)
+
+        # Neither `2` is removed nor `1` stays removed
+        self.assertEqual(self.sync('1', '3', partial=True), {
+            'created': 1, 'removed': 0, 'restored': 1, 'unchanged': 0,
+        })
+        self.assertFalse(Act.objects.filter(removed_from_source=True))
+
+    def test_queries_count(self):
+        self.sync(*map(str, range(10)))
+
+        # Does not grow with the amount of acts, the savepoints included
+        with self.assertNumQueries(8):
+            self.sync(*map(str, range(5, 500)))
+
+
+class ActsBulkTestCase(TestCase):
+    URL = '/acts/acts/bulk/'
+
+    @staticmethod
+    def act(act_id):
+        return {
+            'issuer': 'Sumy',
+            'act_id': act_id,
+            'title': 'T',
+            'documents': [
+                {'order': order, 'url': f'https://smr.gov.ua/{act_id}-{order}'}
+                for order in range(2)
+            ],
+        }
+
+    def patch(self, data):
+        return self.client.patch(
+            self.URL,
+            data,
+            content_type='application/json',
+        )
+
+    def test_create(self):
+        response = self.client.post(
+            '/acts/acts/',
+            [self.act('1'), self.act('2')],
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(act['act_id'] for act in response.json()),
+            ['1', '2'],
+        )
+        self.assertEqual(len(response.json()[0]['documents']), 2)
+        self.assertEqual(Act.objects.count(), 2)
+        self.assertEqual(Document.objects.count(), 4)
+
+    def test_create_invalid(self):
+        response = self.client.post(
+            '/acts/acts/',
+            [self.act('1'), {**self.act('2'), 'title': ''}],
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        # Nothing is created when one of the acts is invalid
+        self.assertFalse(Act.objects.exists())
+
+    def test_update(self):
+        acts = [
+            Act.objects.create(issuer='Sumy', act_id=str(i), title='T')
+            for i in range(3)
+        ]
+
+        response = self.patch({
+            'ids': [acts[0].pk, acts[1].pk],
+            'forwarded': True,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'updated': 2})
+        self.assertEqual(
+            set(Act.objects.filter(forwarded=True).values_list('act_id')),
+            {('0',), ('1',)},
+        )
+        acts[0].refresh_from_db()
+        self.assertGreater(acts[0].updated, acts[2].updated)
+
+    def test_invalid_ids(self):
+        response = self.patch({'ids': ['x'], 'forwarded': True})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.patch({'ids': [], 'forwarded': True})
+        self.assertEqual(response.status_code, 400)
+
+
+class JSONTestCase(TestCase):
+    def test_unicode(self):
+        title = 'Про рішення\u2028№ 1'
+        response = self.client.post(
+            '/acts/acts/',
+            {
+                'issuer': 'Sumy',
+                'act_id': '1',
+                'title': title,
+                'documents': [],
+            },
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.get('/acts/acts/', {'issuer': 'Sumy'})
+        self.assertEqual(response.json()['results'][0]['title'], title)
+        # Not ASCII escaped, but still a JavaScript subset
+        self.assertIn('Про рішення\\u2028№ 1'.encode(), response.content)
+
+    def test_malformed(self):
+        response = self.client.post(
+            '/acts/acts/',
+            b'{"issuer": ',
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_int_keys(self):
+        # The errors of a list are keyed by the int indexes of the items
+        response = self.client.patch(
+            '/acts/acts/bulk/',
+            {'ids': [1, 'x'], 'forwarded': True},
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['ids']), ['1'])
+
+
+class DocumentStagedFileTestCase(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.staging_dir = os.path.join(media_root, 'staging')
+        os.makedirs(self.staging_dir)
+        act = Act.objects.create(issuer='Sumy', act_id='1', title='T')
+        self.document = Document.objects.create(act=act, order=0, url='u')
+
+    def stage(self, name, content=b'content'):
+        with open(os.path.join(self.staging_dir, name), 'wb') as f:
+            f.write(content)
+        return f'staging/{name}'
+
+    def patch(self, document, **data):
+        return self.client.patch(
+            f'/acts/documents/{document.pk}/',
+            data,
+            content_type='application/json',
+        )
+
+    def test_outside_staging_dir(self):
+        self.stage('1.pdf')
+
+        for staged_file in (
+                'staging/../1.pdf',
+                '../staging/1.pdf',
+                'staging/../../etc/passwd',
+                '/etc/passwd',
+                os.path.join(self.staging_dir, '1.pdf'),
+        ):
+            response = self.patch(self.document, staged_file=staged_file)
+
+            self.assertEqual(response.status_code, 400, staged_file)
+            self.assertIn('staged_file', response.json())
+
+        self.document.refresh_from_db()
+        self.assertFalse(self.document.file)
+
+    def test_missing(self):
+        response = self.patch(self.document, staged_file='staging/1.pdf')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('staged_file', response.json())
+
+    def test_store(self):
+        staged_file = self.stage('tmp-1')
+
+        response = self.patch(
+            self.document,
+            staged_file=staged_file,
+            file_name='1.pdf',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['file'], 'acts/Sumy/1.pdf')
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.file.name, 'acts/Sumy/1.pdf')
+        with self.document.file.open() as f:
+            self.assertEqual(f.read(), b'content')
+        self.assertFalse(os.listdir(self.staging_dir))
+
+    def test_same_content(self):
+        sha256 = hashlib.sha256(b'content').hexdigest()
+        self.patch(
+            self.document,
+            staged_file=self.stage('tmp-1'),
+            file_name='1.pdf',
+            sha256=sha256,
+        )
+        document = Document.objects.create(
+            act=self.document.act,
+            order=1,
+            url='u',
+        )
+
+        response = self.patch(
+            document,
+            staged_file=self.stage('tmp-2'),
+            file_name='2.pdf',
+            sha256=sha256,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        # The file of the first document is reused and the staged one deleted
+        self.assertEqual(response.json()['file'], 'acts/Sumy/1.pdf')
+        self.assertFalse(os.listdir(self.staging_dir))
+        self.document.refresh_from_db()
+        self.assertEqual(
+            os.listdir(os.path.dirname(self.document.file.path)),
+            ['1.pdf'],
+        )
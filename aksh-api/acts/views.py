@@ -1,34 +1,115 @@
+from django.db.models import Exists, OuterRef, Prefetch, QuerySet
+from django.utils import timezone
 from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from . import serializers
 from .filters import ActFilter
 from .models import Act, Document
+from .pagination import IdCursorPagination
+
+
+def project(queryset: QuerySet, request) -> QuerySet:
+    """Load only the model fields requested with `?fields=`."""
+    fields = serializers.requested_fields(request)
+    if fields is None:
+        return queryset
+
+    # `only` takes the model fields, so drop the related and unknown ones
+    concrete_fields = {
+        field.name
+        for field in queryset.model._meta.concrete_fields
+    }
+    return queryset.only(*(fields & concrete_fields))
 
 
 class ActViewSet(viewsets.ModelViewSet):
     queryset = Act.objects.all()
     serializer_class = serializers.ActSerializer
     filterset_class = ActFilter
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = serializers.requested_fields(self.request)
+        if fields is None or 'documents' in fields:
+            queryset = queryset.prefetch_related('documents')
+        return project(queryset, self.request)
+
+    def get_serializer(self, *args, **kwargs):
+        # A list in the POST body creates the acts in bulk
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
+    @action(detail=False, methods=['patch'], url_path='bulk')
+    def bulk_update(self, request):
+        serializer = serializers.ActBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = dict(serializer.validated_data)
+        ids = data.pop('ids')
+
+        # `update` skips the `auto_now` fields, so set `updated` explicitly
+        updated = Act.objects.filter(pk__in=ids).update(
+            **data,
+            updated=timezone.now(),
+        )
+
+        return Response({'updated': updated})
+
+    @action(detail=False)
+    def count(self, request):
+        """Count the filtered acts without paging through them."""
+        queryset = self.filter_queryset(Act.objects.all())
+
+        return Response({'count': queryset.count()})
+
+    @action(detail=False, methods=['post'])
+    def sync(self, request):
+        serializer = serializers.ActsSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        summary = Act.objects.sync(
+            serializer.validated_data['issuer'],
+            serializer.validated_data['acts'],
+            partial=serializer.validated_data['partial'],
+        )
+
+        return Response(summary)
 
 
 class DocumentViewSet(viewsets.ModelViewSet):
     serializer_class = serializers.DocumentSerializer
+    pagination_class = IdCursorPagination
 
     def get_queryset(self):
         queryset = Document.objects.all()
         needs_file = self.request.query_params.get('needs_file')
+        has_file = self.request.query_params.get('has_file')
         issuer = self.request.query_params.get('issuer')
         if needs_file is not None:
             queryset = queryset.filter(file='', act__removed_from_source=False)
+        if has_file is not None:
+            queryset = queryset.filter(
+                file__gt='',
+                act__removed_from_source=False,
+            )
         if issuer is not None:
             queryset = queryset.filter(act__issuer=issuer)
-        return queryset
+        return project(queryset, self.request)
 
 
 class ActToForwardViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    # `Exists` instead of joins, which would duplicate the acts
     queryset = Act.objects.filter(
+        Exists(Document.objects.filter(act=OuterRef('pk'))),
         forwarded=False,
         removed_from_source=False,
         needs_inspection=False,
-    ).exclude(documents__file='').prefetch_related('documents')
+    ).exclude(
+        Exists(Document.objects.filter(act=OuterRef('pk'), file='')),
+    ).prefetch_related(
+        Prefetch('documents', queryset=Document.objects.order_by('order')),
+    )
     serializer_class = serializers.ActToForwardSerializer
+    filterset_fields = ('issuer',)
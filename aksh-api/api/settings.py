@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django_filters',
 
     'acts',
+    'jobs',
 ]
 
 SITE_ID = 1
@@ -138,9 +139,22 @@ MEDIA_ROOT = '/api-data/'
 
 MEDIA_URL = '/media/'
 
+# Directory inside `MEDIA_ROOT` where the `async` service streams the
+# downloaded files before they are attached to documents
+MEDIA_STAGING_DIR = 'staging'
+
 
 # DRF
 
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
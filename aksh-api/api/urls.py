@@ -23,6 +23,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
 
     path('acts/', include('acts.urls')),
+    path('jobs/', include('jobs.urls')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,40 @@
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """Renders with orjson, falls back to DRF without it or for indenting.
+
+    The types orjson doesn't know, and the datetimes for the same output,
+    are left to the encoder of DRF.
+    """
+
+    def __init__(self):
+        self._default = self.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+                orjson is None
+                or data is None
+                or indent is not None
+                or self.ensure_ascii
+                or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        content = orjson.dumps(
+            data,
+            default=self._default,
+            # The int keys, e.g. the indexes in the errors of a `ListField`,
+            # become strings as with the stdlib `json`
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # Escaped like DRF does, to keep the output a JavaScript subset
+        return content \
+            .replace(b'\xe2\x80\xa8', b'\\u2028') \
+            .replace(b'\xe2\x80\xa9', b'\\u2029')
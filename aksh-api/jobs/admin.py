@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import Run
+
+
+@admin.register(Run)
+class RunAdmin(admin.ModelAdmin):
+    list_display = (
+        '__str__',
+        'status',
+        'mode',
+        'checkpoint',
+        'watermark',
+        'finished',
+    )
+    list_filter = (
+        'issuer',
+        'status',
+        'mode',
+    )
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Run',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('issuer', models.TextField(choices=[('Vinnytsia', 'Вінниця'), ('Lutsk', 'Луцьк'), ('Dnipro', 'Дніпро'), ('Kramatorsk', 'Краматорськ'), ('Zhytomyr', 'Житомир'), ('Uzhhorod', 'Ужгород'), ('Zaporizhia', 'Запоріжжя'), ('Ivano-Frankivsk', 'Івано-Франківськ'), ('Kropyvnytskyi', 'Кропивницький'), ('Sievierodonetsk', 'Сєвєродонецьк'), ('Lviv', 'Львів'), ('Kyiv', 'Київ'), ('Sevastopol', 'Севастополь'), ('Mykolaiv', 'Миколаїв'), ('Odessa', 'Одеса'), ('Poltava', 'Полтава'), ('Rivne', 'Рівне'), ('Sumy', 'Суми'), ('Ternopil', 'Тернопіль'), ('Kharkiv', 'Харків'), ('Kherson', 'Херсон'), ('Khmelnytskyi', 'Хмельницький'), ('Cherkasy', 'Черкаси'), ('Chernivtsi', 'Чернівці'), ('Chernihiv', 'Чернігів')])),
+                ('status', models.TextField(choices=[('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], default='running')),
+                ('checkpoint', models.TextField(blank=True, choices=[('parse', 'Parse'), ('store', 'Store'), ('download', 'Download'), ('forward', 'Forward')], null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='run',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'running')), fields=('issuer',), name='single_running_run_per_issuer'),
+        ),
+    ]
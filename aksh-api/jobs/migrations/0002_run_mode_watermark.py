@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='run',
+            name='mode',
+            field=models.TextField(choices=[('full', 'Full scan'), ('incremental', 'Incremental')], default='full'),
+        ),
+        migrations.AddField(
+            model_name='run',
+            name='since',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='run',
+            name='watermark',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
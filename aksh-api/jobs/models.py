@@ -0,0 +1,54 @@
+from django.db import models
+
+from acts.models import ACT_ISSUERS
+from core.models import DatedModel
+
+RUN_STATUSES = (
+    ('running', 'Running'),
+    ('finished', 'Finished'),
+    ('failed', 'Failed'),
+)
+
+RUN_MODES = (
+    # Parses everything and marks the acts missing from the source
+    ('full', 'Full scan'),
+    # Parses only the acts published since the watermark of the last run
+    ('incremental', 'Incremental'),
+)
+
+# In the order they are run
+RUN_STAGES = (
+    ('parse', 'Parse'),
+    ('store', 'Store'),
+    ('download', 'Download'),
+    ('forward', 'Forward'),
+)
+
+
+class Run(DatedModel):
+    """A run of the acts pipeline for one issuer."""
+
+    class Meta:
+        constraints = (
+            # Only one run per issuer at a time
+            models.UniqueConstraint(
+                fields=('issuer',),
+                condition=models.Q(status='running'),
+                name='single_running_run_per_issuer',
+            ),
+        )
+
+    issuer = models.TextField(choices=ACT_ISSUERS)
+    status = models.TextField(choices=RUN_STATUSES, default='running')
+    mode = models.TextField(choices=RUN_MODES, default='full')
+    # The date the acts are parsed from, None for a full scan
+    since = models.DateField(null=True, blank=True)
+    # The acts published up to this date are parsed by the run
+    watermark = models.DateField(null=True, blank=True)
+    # The last completed stage, a resumed run continues after it
+    checkpoint = models.TextField(choices=RUN_STAGES, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.get_issuer_display()}: {self.created:%Y-%m-%d %H:%M}'
@@ -0,0 +1,18 @@
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Run
+
+
+class RunSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Run
+        fields = '__all__'
+        read_only_fields = ('finished',)
+        # The single-flight constraint is checked by the database
+        validators = ()
+
+    def update(self, instance, validated_data):
+        if validated_data.get('status', 'running') != 'running':
+            validated_data['finished'] = timezone.now()
+        return super().update(instance, validated_data)
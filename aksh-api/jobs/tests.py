@@ -0,0 +1,58 @@
+from django.test import TestCase
+
+from .models import Run
+
+
+class RunTestCase(TestCase):
+    URL = '/jobs/runs/'
+
+    def start(self, issuer):
+        return self.client.post(
+            self.URL,
+            {'issuer': issuer},
+            content_type='application/json',
+        )
+
+    def test_single_flight(self):
+        response = self.start('Sumy')
+        self.assertEqual(response.status_code, 201)
+        run = response.json()
+
+        # The running run is returned instead of starting a new one
+        response = self.start('Sumy')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['id'], run['id'])
+
+        self.assertEqual(self.start('Dnipro').status_code, 201)
+
+        response = self.client.patch(
+            f'{self.URL}{run["id"]}/',
+            {'status': 'finished', 'checkpoint': 'forward'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['finished'])
+
+        self.assertEqual(self.start('Sumy').status_code, 201)
+        self.assertEqual(Run.objects.filter(status='running').count(), 2)
+
+    def test_latest(self):
+        for issuer, status in (
+                ('Sumy', 'finished'),
+                ('Sumy', 'failed'),
+                ('Dnipro', 'finished'),
+                ('Sumy', 'running'),
+        ):
+            Run.objects.create(issuer=issuer, status=status)
+
+        response = self.client.get(f'{self.URL}latest/')
+        self.assertEqual(
+            {(r['issuer'], r['status']) for r in response.json()},
+            {('Sumy', 'running'), ('Dnipro', 'finished')},
+        )
+
+        response = self.client.get(f'{self.URL}latest/?status=failed')
+        self.assertEqual(
+            [(r['issuer'], r['status']) for r in response.json()],
+            [('Sumy', 'failed')],
+        )
@@ -0,0 +1,8 @@
+from rest_framework import routers
+
+from .views import RunViewSet
+
+
+router = routers.SimpleRouter()
+router.register(r'runs', RunViewSet)
+urlpatterns = router.urls
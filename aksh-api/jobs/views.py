@@ -0,0 +1,41 @@
+from django.db import IntegrityError, transaction
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import Run
+from .serializers import RunSerializer
+
+
+class RunViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = Run.objects.order_by('-id')
+    serializer_class = RunSerializer
+    filterset_fields = ('issuer', 'status', 'mode')
+
+    def create(self, request, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().create(request, *args, **kwargs)
+        except IntegrityError:
+            # The issuer already has a running run, return it instead
+            running = Run.objects.get(
+                issuer=request.data['issuer'],
+                status='running',
+            )
+            serializer = self.get_serializer(running)
+            return Response(serializer.data, status=status.HTTP_409_CONFLICT)
+
+    @action(detail=False)
+    def latest(self, request):
+        """The latest run of every issuer, filtered like the list."""
+        queryset = self.filter_queryset(
+            Run.objects.order_by('issuer', '-id').distinct('issuer'),
+        )
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
@@ -1,221 +1,212 @@
-import asyncio
+import datetime
 import logging
-import os
-import pathlib
-from datetime import datetime
-from email.utils import parsedate_tz
+import time
 # noinspection PyPep8Naming
 import typing as T
 
-import aiohttp
-import lxml.html
-import magic
-import textract
-
-from app.acts.structures import Act
-from app.core.services import ServiceException
-from .services import API, Interest
+from app.acts.structures import Act, ActToForward
+from app.core import metrics
+from app.core.pipelines import Stage, run_pipeline
+from app.core.progress import ProgressHub
+from app.core.settings import (
+    DOWNLOAD_WORKERS,
+    EXTRACTION_WORKERS,
+    FORWARD_WORKERS,
+    MEDIA_DIR,
+    PIPELINE_QUEUE_SIZE,
+    STAGING_DIR,
+)
+from app.core.tracing import span
+from .downloaders import DocumentsDownloader
+from .extraction import engine
+from .forwarders import ActsForwarder
+from .parsers import Parser
+from .services import API
 
 
 logger = logging.getLogger(__name__)
 
 
-CYRILLIC_O = 'о'.encode()
-
-DOC = 'application/msword'
-DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-PDF = 'application/pdf'
-RTF = 'text/rtf'
-TXT = 'text/plain'
-XLS = 'application/vnd.ms-excel'
-XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-
-
-def read_document(file_path: str) -> bytes:
-    base_kwargs = {'filename': file_path, 'language': 'ukr'}
-    ft = magic.from_file(file_path, mime=True)
-    if ft in TXT:
-        content = textract.process(**base_kwargs)
-    elif ft == DOC:
-        try:
-            content = textract.process(**base_kwargs, extension='doc')
-        except TypeError:
-            # Sometimes this raises when chardet cannot determine the encoding.
-            # @TODO: find a solution
-            # /api-data/acts/Sumy/514-Dodatok_1._Ocikuvani_rezultati.doc
-            # /api-data/acts/Sumy/Dodatok_1._Ocikuvani_rezultati.doc
-            # /api-data/acts/Dnipro/wsGetTextPublicDocumentpID359609
-            return b''
-    elif ft == DOCX:
-        content = textract.process(**base_kwargs, extension='docx')
-    elif ft == PDF:
-        _kwargs = {**base_kwargs, 'extension': 'pdf'}
-        content = textract.process(**_kwargs)
-
-        # If the document doesn't contain the ukrainian letter
-        # `о` - probably it's a bunch of scanned paper sheets,
-        # so use tesseract
-        if CYRILLIC_O not in content:
-            _kwargs['method'] = 'tesseract'
-            content = textract.process(**_kwargs)
-    elif ft == RTF:
-        # noinspection SpellCheckingInspection
-        html = os.popen(f'unrtf {file_path}').read()
-        doc = lxml.html.document_fromstring(html)
-        content = doc.text_content().strip().encode()
-    elif ft in {XLS, XLSX}:
-        # We're not interested in spreadsheets data
-        return b''
-    else:
-        raise NotImplementedError(f'Check {file_path} type')
-
-    # If the document doesn't contain the ukrainian letter `о`
-    if CYRILLIC_O not in content:
-        message = f'Check extraction from {file_path}'
-        raise Exception(message)
-
-    return content
-# from app.acts.acts_processors import read_document
-# import pathlib, magic, textract, contextlib
-# paths = sorted(pathlib.Path('/api-data/acts/Dnipro').iterdir())
-# n = len(paths)
-# m = len(str(n))
-# for i, f in enumerate(paths, 1):
-#     file_path = str(f)
-#     print(f'{str(i).rjust(m)}/{n}:', file_path)
-#     with contextlib.suppress(TypeError):
-#         read_document(file_path)
-
-
 class ActsProcessor:
-    def __init__(
-            self,
-            message_queue: asyncio.Queue,
-            *parsers: T.Tuple[
-                str,
-                T.Callable[[T.Callable], T.Awaitable[T.Mapping[str, Act]]],
-            ],
-    ):
-        self.message_queue = message_queue
-        self.parsers = parsers
-
-    async def _main_spy(self, message: str) -> None:
-        await self.message_queue.put({
-            'type': 'acts-processor-message',
-            'message': message,
-        })
-
-    def _create_spy(
-            self,
-            type_: str,
-            issuer: str,
-    ) -> T.Callable[[str], T.Awaitable[None]]:
-        async def _spy(message: str) -> None:
-            await self.message_queue.put({
-                'type': type_,
-                'issuer': issuer,
-                'message': message,
-            })
+    """The stages of the acts pipeline for a single issuer."""
 
-        return _spy
+    def __init__(self, progress: ProgressHub):
+        self.progress = progress
 
-    async def _parse_acts_and_store_documents(
+    async def parse(
             self,
             issuer: str,
-            parser: T.Callable[[T.Callable], T.Awaitable[T.Mapping[str, Act]]],
-    ):
-        parser_spy = self._create_spy('parser-message', issuer)
-        storing_spy = self._create_spy('storing-message', issuer)
-        docs_loader_spy = self._create_spy('docs-loader-message', issuer)
-
-        await parser_spy('Collecting main acts data')
-        acts = await parser(parser_spy)
-
-        await storing_spy('Storing acts to the database')
-        stored = {
-            act.act_id: act
-            for act in await API.fetch_acts(issuer=issuer)
-        }
+            parser: Parser,
+            since: datetime.date = None,
+    ) -> T.Mapping[str, Act]:
+        parser_spy = self.progress.informer(issuer, 'parse')
+        if since is None:
+            await parser_spy('Collecting main acts data')
+        else:
+            await parser_spy(f'Collecting main acts data since {since}')
+        started = time.perf_counter()
+        with span('parse', issuer=issuer):
+            acts = await parser(parser_spy, since)
+        metrics.PARSE_SECONDS.labels(issuer).observe(
+            time.perf_counter() - started,
+        )
 
-        await storing_spy('Storing main acts data')
-        new_acts_stored = 0
+        # The only acts not coming from the `api`, which would reject the
+        # whole sync because of one broken act
+        valid_acts = {}
         for act_id, act in acts.items():
-            if act_id in stored:
-                del stored[act_id]
+            try:
+                act.validate()
+            except ValueError as e:
+                await parser_spy(f'Skipping an act: {e}')
             else:
-                await API.create_act(act)
-                new_acts_stored += 1
-        if new_acts_stored:
-            await storing_spy(f'{new_acts_stored} new acts stored')
-        else:
-            await storing_spy(f'No new acts stored')
-
-        # If any of the previously stored acts was not found on the
-        # current acts list - mark them as `removed`
-        if stored:
-            n = len(stored)
-            await storing_spy(f'Marking {n} acts as removed')
-            for act in stored.values():
-                await API.change_act(act.id, removed_from_source=True)
-
-        await docs_loader_spy('Download every missing document')
-        docs_without_files = await API.fetch_documents(
-            needs_file=1,
-            issuer=issuer,
+                valid_acts[act_id] = act
+        metrics.PARSED_ACTS.labels(issuer, 'valid').inc(len(valid_acts))
+        metrics.PARSED_ACTS.labels(issuer, 'invalid').inc(
+            len(acts) - len(valid_acts),
         )
-        total = len(docs_without_files)
-        await docs_loader_spy(f'Missing documents: {total}')
-
-        for i, document in enumerate(docs_without_files, 1):
-            await docs_loader_spy(f'Downloading {i} document out of {total}')
-            async with aiohttp.ClientSession() as session:
-                async with session.get(document.url, timeout=120) as response:
-                    file_name = document.url.rsplit('/', 1)[1]
-                    last_modified = response.headers.get('Last-Modified')
-                    if last_modified is None:
-                        lm_datetime = datetime.today()
-                    else:
-                        lm_datetime = datetime(*parsedate_tz(last_modified)[:6])
-                    files = [('file', file_name, await response.read())]
-                    await API.change_document(
-                        document.id,
-                        files=files,
-                        last_modified=str(lm_datetime),
-                    )
-                    await asyncio.sleep(1)
-
-        await docs_loader_spy(f'{total} documents downloaded')
+        return valid_acts
 
-    async def forward_the_docs(self):
-        acts = await API.fetch_acts_to_forward()
-        total = len(acts)
-        await self._main_spy(f'{total} acts to forward')
-
-        for i, act in enumerate(acts, 1):
-            await self._main_spy(f'Forwarding {i} out of {total}')
-
-            the_file_to_send = b''
-            for file in act.files:
-                content = read_document(f'/api-data/{file}')
-                the_file_to_send = b'.\n\n\n'.join((the_file_to_send, content))
-            act.file_content = the_file_to_send[4:]
+    async def store(
+            self,
+            issuer: str,
+            acts: T.Iterable[Act],
+            partial: bool = False,
+    ) -> None:
+        storing_spy = self.progress.informer(issuer, 'store')
+        await storing_spy('Storing acts to the database')
+        summary = await API.sync_acts(issuer, acts, partial)
+        await storing_spy(
+            f"{summary['created']} new acts stored, "
+            f"{summary['removed']} marked as removed, "
+            f"{summary['restored']} restored"
+        )
 
+    async def process(
+            self,
+            issuer: str,
+            checkpoint: T.Callable[[str], T.Awaitable[None]],
+            workers: int = DOWNLOAD_WORKERS,
+    ) -> None:
+        """Download, extract and forward the pending acts of the `issuer`.
+
+        Every act moves on as soon as the previous stage is done with it,
+        the `checkpoint` is called with the name of every drained stage.
+        The documents are downloaded by at most `workers` at a time.
+        """
+        docs_loader_spy = self.progress.informer(issuer, 'download')
+        extraction_spy = self.progress.informer(issuer, 'extract')
+        forwarder_spy = self.progress.informer(issuer, 'forward')
+        pending = {
+            'issuer': issuer,
+            'forwarded': 'false',
+            'removed_from_source': 'false',
+            'needs_inspection': 'false',
+        }
+        # The acts handled by a stage, published at most every
+        # `PROGRESS_INTERVAL` seconds
+        total = await API.count_acts(**pending)
+        download_progress = self.progress.tracker(issuer, 'download', total)
+        forward_progress = self.progress.tracker(issuer, 'forward', total)
+        documents_dir = MEDIA_DIR / 'acts' / issuer
+        documents_dir.mkdir(exist_ok=True, parents=True)
+        STAGING_DIR.mkdir(exist_ok=True, parents=True)
+
+        downloader = DocumentsDownloader(docs_loader_spy, workers)
+        session = downloader.session()
+
+        async def download(act: Act) -> T.Optional[Act]:
+            if not act.documents:
+                return None
+
+            documents = []
+            with span('download', issuer=issuer, act=act.id):
+                for document in act.documents:
+                    if not document.file:
+                        document = await downloader.fetch(session, document)
+                        if document is None:
+                            # Retried by the next run
+                            return None
+                    documents.append(document)
+
+            act.documents = documents
+            return act
+
+        async def downloaded() -> None:
+            download_progress.flush()
+            if downloader.failed:
+                await docs_loader_spy(f'{downloader.failed} documents failed')
+            await checkpoint('download')
+
+        async def extract(act: Act) -> T.Optional[ActToForward]:
+            act_to_forward = ActToForward.from_act(act)
             try:
-                await Interest.forward_act(act)
-            except Interest.ServiceException:
-                continue
-
-            await API.change_act(act.id, forwarded=True)
-
-        await self._main_spy(f'{total} acts forwarded')
-
-    async def do_the_job(self):
-        futures = []
-        for issuer, parser in self.parsers:
-            documents_dir = pathlib.Path(f'/api-data/acts/{issuer}')
-            documents_dir.mkdir(exist_ok=True, parents=True)
-            futures.append(self._parse_acts_and_store_documents(issuer, parser))
-
-        await asyncio.gather(*futures)
-        await self.forward_the_docs()
-        await self.message_queue.put({'done': True})
+                with span('extract', issuer=issuer, act=act.id):
+                    contents = await engine.extract_many(
+                        str(MEDIA_DIR / file) for file in act_to_forward.files
+                    )
+            except Exception as e:
+                logger.exception(f'Error extracting act #{act.id}')
+                await extraction_spy(f'Extraction failed: {e}')
+                return None
+
+            act_to_forward.file_contents = contents
+            return act_to_forward
+
+        forwarder = ActsForwarder(forwarder_spy)
+
+        async def forward(act: ActToForward) -> T.Optional[ActToForward]:
+            with span('forward', issuer=issuer, act=act.id):
+                if not await forwarder.forward(act):
+                    return None
+
+            return act
+
+        async def forwarded() -> None:
+            forward_progress.flush()
+            if forwarder.failed:
+                await forwarder_spy(f'{forwarder.failed} acts set aside')
+            if forwarder.postponed:
+                await forwarder_spy(f'{forwarder.postponed} acts left pending')
+            await checkpoint('forward')
+
+        forwarding = Stage(
+            'forward',
+            forward,
+            FORWARD_WORKERS,
+            forwarded,
+            forward_progress.update,
+        )
+        async with session:
+            await run_pipeline(
+                API.iter_acts(**pending),
+                Stage(
+                    'download',
+                    download,
+                    workers,
+                    downloaded,
+                    download_progress.update,
+                ),
+                # Enough acts in flight to load the extraction pool
+                Stage('extract', extract, EXTRACTION_WORKERS * 2),
+                forwarding,
+                queue_size=PIPELINE_QUEUE_SIZE,
+                name=issuer,
+            )
+        await forwarder_spy(f'{forwarding.passed} acts forwarded')
+
+    async def refresh(self, issuer: str) -> None:
+        """Check the downloaded documents of the `issuer` for changes."""
+        docs_loader_spy = self.progress.informer(issuer, 'refresh')
+        await docs_loader_spy('Refreshing the downloaded documents')
+        docs_with_files = await API.fetch_documents(
+            has_file=1,
+            issuer=issuer,
+        )
+        total = len(docs_with_files)
+        progress = self.progress.tracker(issuer, 'refresh', total)
+        refresher = DocumentsDownloader(docs_loader_spy)
+        await refresher.download(docs_with_files, progress.update)
+        progress.flush()
+        changed = refresher.downloaded - refresher.unchanged
+        await docs_loader_spy(f'{changed} documents changed')
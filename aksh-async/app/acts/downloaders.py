@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import logging
+import pathlib
+import uuid
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_tz
+# noinspection PyPep8Naming
+import typing as T
+
+import aiohttp
+from aiofile import async_open
+
+from app.acts.structures import Document
+from app.core import metrics
+from app.core.http_cache import Session, open_session
+from app.core.retrying import retry
+from app.core.services import ServiceException
+from app.core.settings import (
+    DOWNLOAD_BACKOFF,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_RETRIES,
+    DOWNLOAD_WORKERS,
+    MEDIA_DIR,
+    STAGING_DIR,
+)
+from .services import API
+
+
+logger = logging.getLogger(__name__)
+
+
+class ServerError(Exception):
+    """The source responded with 5xx, the request may be retried."""
+
+
+class DocumentsDownloader:
+    RETRY_ON = (
+        asyncio.TimeoutError,
+        aiohttp.ClientConnectionError,
+        ServerError,
+    )
+
+    def __init__(
+            self,
+            inform: T.Callable[[str], T.Awaitable],
+            workers: int = DOWNLOAD_WORKERS,
+    ):
+        self.inform = inform
+        self.workers = workers
+        self.downloaded = 0
+        self.unchanged = 0
+        self.failed = 0
+
+    @staticmethod
+    def _conditional_headers(document: Document) -> T.Dict[str, str]:
+        """Let the source skip sending a file we already have."""
+        if not document.file:
+            return {}
+
+        headers = {}
+        if document.etag:
+            headers['If-None-Match'] = document.etag
+        if document.last_modified:
+            last_modified = document.last_modified
+            if last_modified.tzinfo is None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc)
+            headers['If-Modified-Since'] = format_datetime(
+                last_modified.astimezone(timezone.utc),
+                usegmt=True,
+            )
+        return headers
+
+    @staticmethod
+    async def _stream_to_file(
+            response: aiohttp.ClientResponse,
+            path: pathlib.Path,
+    ) -> str:
+        """Write the response body to the `path` and return its SHA-256."""
+        sha256 = hashlib.sha256()
+        chunks = response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE)
+        async with async_open(path, 'wb') as file:
+            async for chunk in chunks:
+                sha256.update(chunk)
+                await file.write(chunk)
+                metrics.DOWNLOADED_BYTES.inc(len(chunk))
+
+        return sha256.hexdigest()
+
+    async def _fetch(
+            self,
+            session: Session,
+            document: Document,
+    ) -> Document:
+        staged_path = STAGING_DIR / uuid.uuid4().hex
+        try:
+            async with session.get(
+                    document.url,
+                    headers=self._conditional_headers(document),
+                    timeout=120,
+            ) as response:
+                if response.status >= 500:
+                    raise ServerError(f'{response.status} from {document.url}')
+                if response.status == 304:
+                    self.unchanged += 1
+                    return document
+                response.raise_for_status()
+
+                file_name = document.url.rsplit('/', 1)[1]
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if last_modified is None:
+                    lm_datetime = datetime.today()
+                else:
+                    lm_datetime = datetime(*parsedate_tz(last_modified)[:6])
+                sha256 = await self._stream_to_file(response, staged_path)
+
+            if sha256 == document.sha256:
+                # Same content, only remember the new validators
+                self.unchanged += 1
+                return await API.change_document(
+                    document.id,
+                    etag=etag,
+                    last_modified=str(lm_datetime),
+                )
+            else:
+                return await API.change_document(
+                    document.id,
+                    staged_file=str(staged_path.relative_to(MEDIA_DIR)),
+                    file_name=file_name,
+                    sha256=sha256,
+                    etag=etag,
+                    last_modified=str(lm_datetime),
+                )
+        finally:
+            # The API moves the staged file on success
+            staged_path.unlink(missing_ok=True)
+
+    def session(self) -> Session:
+        return open_session(limit=self.workers, endpoint='documents')
+
+    async def fetch(
+            self,
+            session: Session,
+            document: Document,
+    ) -> T.Optional[Document]:
+        """Download the `document` and return its new state.
+
+        Returns None if the download failed even after the retries.
+        """
+        try:
+            document = await retry(
+                lambda: self._fetch(session, document),
+                exceptions=self.RETRY_ON,
+                attempts=DOWNLOAD_RETRIES,
+                backoff=DOWNLOAD_BACKOFF,
+            )
+        except (aiohttp.ClientError, ServiceException, *self.RETRY_ON):
+            logger.exception(f'Error downloading {document.url}')
+            self.failed += 1
+            await self.inform(f'Failed to download {document.url}')
+            return None
+
+        self.downloaded += 1
+        return document
+
+    async def _worker(
+            self,
+            session: Session,
+            queue: asyncio.Queue,
+            progress: T.Optional[T.Callable[[int], None]],
+    ) -> None:
+        while not queue.empty():
+            document: Document = queue.get_nowait()
+            await self.fetch(session, document)
+            if progress is not None:
+                progress(self.downloaded + self.failed)
+
+    async def download(
+            self,
+            documents: T.Sequence[Document],
+            progress: T.Callable[[int], None] = None,
+    ) -> int:
+        """Download the `documents` and return the amount of successes.
+
+        The `progress` is called with the amount of handled documents.
+        """
+        queue = asyncio.Queue()
+        for document in documents:
+            queue.put_nowait(document)
+
+        STAGING_DIR.mkdir(exist_ok=True, parents=True)
+        workers = min(self.workers, len(documents))
+        async with self.session() as session:
+            await asyncio.gather(*(
+                self._worker(session, queue, progress)
+                for _ in range(workers)
+            ))
+
+        return self.downloaded
@@ -0,0 +1,244 @@
+import asyncio
+import collections
+import dataclasses
+import logging
+import multiprocessing
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+# noinspection PyPep8Naming
+import typing as T
+
+import magic
+
+from app.core import metrics
+from app.core.settings import (
+    EXTRACTION_TIMEOUT,
+    EXTRACTION_WORKERS,
+    OCR_PAGE_TIMEOUT,
+)
+from . import extractors, ocr, text_cache
+from .extractors import PDF, ExtractionTimeout
+from .ocr import CYRILLIC_O
+
+
+logger = logging.getLogger(__name__)
+
+
+Result = T.TypeVar('Result')
+
+
+def read_document(file_path: str) -> bytes:
+    return _read(file_path).content
+
+
+def _read(file_path: str, mime_type: str = None) -> extractors.Extraction:
+    extraction = extractors.extract(file_path, mime_type)
+    if not extraction.skipped:
+        _check_content(file_path, extraction.content)
+    return extraction
+
+
+def _check_content(file_path: str, content: bytes) -> None:
+    # If the document doesn't contain the ukrainian letter `о`
+    if CYRILLIC_O not in content:
+        message = f'Check extraction from {file_path}'
+        raise Exception(message)
+# from app.acts.extraction import read_document
+# import pathlib, contextlib
+# paths = sorted(pathlib.Path('/api-data/acts/Dnipro').iterdir())
+# n = len(paths)
+# m = len(str(n))
+# for i, f in enumerate(paths, 1):
+#     file_path = str(f)
+#     print(f'{str(i).rjust(m)}/{n}:', file_path)
+#     with contextlib.suppress(TypeError):
+#         read_document(file_path)
+
+
+def _raise_timeout(*_) -> None:
+    raise ExtractionTimeout
+
+
+def _with_timeout(
+        timeout: int,
+        description: str,
+        func: T.Callable[..., Result],
+        *args,
+) -> Result:
+    """Call `func` in a pool worker, interrupting it on timeout."""
+    # Workers are single-threaded processes, so the alarm can interrupt
+    # the extraction (a helper process it waits for keeps running)
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.alarm(timeout)
+    try:
+        return func(*args)
+    except ExtractionTimeout:
+        message = f'{description} took more than {timeout}s'
+        raise ExtractionTimeout(message) from None
+    finally:
+        signal.alarm(0)
+
+
+def _lookup_in_worker(
+        file_path: str,
+) -> T.Tuple[str, T.Optional[bytes], str]:
+    """Return the file hash, its cached text and its MIME type."""
+    sha256 = text_cache.file_sha256(file_path)
+    content = text_cache.cache.get(sha256)
+    mime = magic.from_file(file_path, mime=True) if content is None else ''
+    return sha256, content, mime
+
+
+def _read_document_in_worker(
+        file_path: str,
+        mime_type: str,
+        sha256: str,
+        timeout: int,
+) -> extractors.Extraction:
+    description = f'Extraction from {file_path}'
+    extraction = _with_timeout(
+        timeout,
+        description,
+        _read,
+        file_path,
+        mime_type,
+    )
+    text_cache.cache.put(sha256, extraction.content)
+    return extraction
+
+
+def _text_layer_in_worker(
+        file_path: str,
+        timeout: int,
+) -> T.Tuple[T.List[bytes], float]:
+    description = f'Extraction from {file_path}'
+    started = time.perf_counter()
+    pages = _with_timeout(
+        timeout,
+        description,
+        ocr.text_layer_pages,
+        file_path,
+    )
+    return pages, time.perf_counter() - started
+
+
+def _ocr_page_in_worker(
+        file_path: str,
+        page: int,
+        timeout: int,
+) -> T.Tuple[bytes, float]:
+    description = f'OCR of page {page} of {file_path}'
+    started = time.perf_counter()
+    text = _with_timeout(timeout, description, ocr.ocr_page, file_path, page)
+    return text, time.perf_counter() - started
+
+
+@dataclasses.dataclass
+class BackendStats:
+    calls: int = 0
+    failures: int = 0
+    seconds: float = 0
+
+
+class ExtractionEngine:
+    """Extract the documents text in a pool of processes."""
+
+    def __init__(
+            self,
+            workers: int = EXTRACTION_WORKERS,
+            timeout: int = EXTRACTION_TIMEOUT,
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        # Time spent by every extraction backend, by its name
+        self.stats: T.DefaultDict[str, BackendStats] = \
+            collections.defaultdict(BackendStats)
+        self._executor: T.Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking the running app would copy the locks held by its
+            # threads, so the workers fork from a clean server process
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload([__name__])
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+            )
+        return self._executor
+
+    def _record(
+            self,
+            mime_type: str,
+            backend: str,
+            seconds: float,
+            failed: bool = False,
+    ) -> None:
+        stats = self.stats[backend]
+        stats.calls += 1
+        stats.failures += failed
+        stats.seconds += seconds
+        metrics.EXTRACTION_SECONDS.labels(mime_type, backend).observe(seconds)
+        if failed:
+            metrics.EXTRACTION_FAILURES.labels(mime_type, backend).inc()
+
+    async def _run(self, func: T.Callable[..., Result], *args) -> Result:
+        # Cancelling the awaiting task cancels the pending pool job as well
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def _extract_pdf(self, file_path: str, sha256: str) -> bytes:
+        """Extract the text layer at once and OCR the pages in parallel."""
+        pages, seconds = await self._run(
+            _text_layer_in_worker,
+            file_path,
+            self.timeout,
+        )
+        self._record(PDF, 'pdftotext', seconds)
+
+        numbers = ocr.pages_to_ocr(pages)
+        results = await asyncio.gather(*(
+            self._run(_ocr_page_in_worker, file_path, n, OCR_PAGE_TIMEOUT)
+            for n in numbers
+        ))
+        for number, (text, seconds) in zip(numbers, results):
+            self._record(PDF, 'tesseract', seconds)
+            pages[number - 1] = text
+
+        content = ocr.join_pages(pages)
+        _check_content(file_path, content)
+        await self._run(text_cache.cache.put, sha256, content)
+        return content
+
+    async def extract(self, file_path: str) -> bytes:
+        sha256, content, mime = await self._run(_lookup_in_worker, file_path)
+        if content is not None:
+            metrics.EXTRACTION_CACHE_HITS.inc()
+            return content
+        if mime == PDF:
+            return await self._extract_pdf(file_path, sha256)
+
+        extraction = await self._run(
+            _read_document_in_worker,
+            file_path,
+            mime,
+            sha256,
+            self.timeout,
+        )
+        for backend, seconds in extraction.timings.items():
+            failed = backend != extraction.backend
+            self._record(mime, backend, seconds, failed)
+        return extraction.content
+
+    async def extract_many(self, file_paths: T.Iterable[str]) -> T.List[bytes]:
+        return list(await asyncio.gather(*map(self.extract, file_paths)))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+engine = ExtractionEngine()
@@ -0,0 +1,188 @@
+"""Text extractors registry keyed by the MIME type of the files.
+
+Every MIME type has an ordered list of backends: the in-process ones go
+first and the ones spawning helper processes are the fallback.
+"""
+import collections
+import dataclasses
+import logging
+import pathlib
+import subprocess
+import time
+# noinspection PyPep8Naming
+import typing as T
+import zipfile
+
+import lxml.html
+import magic
+import textract
+from lxml import etree
+
+from . import ocr
+from .rtf import rtf_to_text
+
+
+logger = logging.getLogger(__name__)
+
+
+DOC = 'application/msword'
+DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+PDF = 'application/pdf'
+RTF = 'text/rtf'
+TXT = 'text/plain'
+XLS = 'application/vnd.ms-excel'
+XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+Backend = T.Callable[[str], bytes]
+
+REGISTRY: T.DefaultDict[str, T.List[T.Tuple[str, Backend]]] = \
+    collections.defaultdict(list)
+
+
+class ExtractionError(Exception):
+    pass
+
+
+class ExtractionTimeout(ExtractionError):
+    pass
+
+
+class Unreadable(Exception):
+    """The file has no text we can (or want to) extract."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Extraction:
+    content: bytes
+    # The backend which extracted the content
+    backend: str
+    # Seconds spent by every tried backend, including the failed ones
+    timings: T.Mapping[str, float]
+    skipped: bool = False
+
+
+def register(name: str, *mime_types: str) -> T.Callable[[Backend], Backend]:
+    def decorator(backend: Backend) -> Backend:
+        for mime_type in mime_types:
+            REGISTRY[mime_type].append((name, backend))
+        return backend
+
+    return decorator
+
+
+def extract(file_path: str, mime_type: str = None) -> Extraction:
+    if mime_type is None:
+        mime_type = magic.from_file(file_path, mime=True)
+    backends = REGISTRY.get(mime_type)
+    if not backends:
+        raise NotImplementedError(f'Check {file_path} type')
+
+    timings = {}
+    for i, (name, backend) in enumerate(backends, 1):
+        started = time.perf_counter()
+        try:
+            content = backend(file_path)
+        except Unreadable:
+            timings[name] = time.perf_counter() - started
+            return Extraction(b'', name, timings, skipped=True)
+        except ExtractionTimeout:
+            raise
+        except Exception:
+            timings[name] = time.perf_counter() - started
+            if i == len(backends):
+                raise
+            logger.exception(f'{name} failed to extract {file_path}')
+            continue
+
+        timings[name] = time.perf_counter() - started
+        return Extraction(content, name, timings)
+
+
+@register('text', TXT)
+def read_text(file_path: str) -> bytes:
+    raw = pathlib.Path(file_path).read_bytes()
+    try:
+        text = raw.decode('utf-8')
+    except UnicodeDecodeError:
+        # The old documents are usually in windows-1251
+        text = raw.decode('cp1251', 'replace')
+    return text.encode()
+
+
+@register('antiword', DOC)
+def read_doc(file_path: str) -> bytes:
+    try:
+        return textract.process(
+            filename=file_path,
+            language='ukr',
+            extension='doc',
+        )
+    except TypeError:
+        # Sometimes this raises when chardet cannot determine the encoding.
+        # @TODO: find a solution
+        # /api-data/acts/Sumy/514-Dodatok_1._Ocikuvani_rezultati.doc
+        # /api-data/acts/Sumy/Dodatok_1._Ocikuvani_rezultati.doc
+        # /api-data/acts/Dnipro/wsGetTextPublicDocumentpID359609
+        raise Unreadable from None
+
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+@register('docx', DOCX)
+def read_docx(file_path: str) -> bytes:
+    with zipfile.ZipFile(file_path) as docx:
+        root = etree.fromstring(docx.read('word/document.xml'))
+
+    paragraphs = []
+    for paragraph in root.iter(f'{W}p'):
+        parts = []
+        for node in paragraph.iter(f'{W}t', f'{W}tab', f'{W}br'):
+            if node.tag == f'{W}t':
+                parts.append(node.text or '')
+            elif node.tag == f'{W}tab':
+                parts.append('\t')
+            else:
+                parts.append('\n')
+        paragraphs.append(''.join(parts))
+
+    return '\n'.join(paragraphs).strip().encode()
+
+
+@register('textract-docx', DOCX)
+def read_docx_with_textract(file_path: str) -> bytes:
+    return textract.process(
+        filename=file_path,
+        language='ukr',
+        extension='docx',
+    )
+
+
+@register('poppler', PDF)
+def read_pdf(file_path: str) -> bytes:
+    # The pages without a text layer are OCR-ed with tesseract
+    return ocr.read_pdf(file_path)
+
+
+@register('rtf', RTF)
+def read_rtf(file_path: str) -> bytes:
+    rtf = pathlib.Path(file_path).read_text(encoding='latin-1')
+    return rtf_to_text(rtf).strip().encode()
+
+
+# noinspection SpellCheckingInspection
+@register('unrtf', RTF)
+def read_rtf_with_unrtf(file_path: str) -> bytes:
+    html = subprocess.run(
+        ['unrtf', file_path],
+        stdout=subprocess.PIPE,
+        check=True,
+    ).stdout
+    doc = lxml.html.document_fromstring(html)
+    return doc.text_content().strip().encode()
+
+
+@register('spreadsheet', XLS, XLSX)
+def skip_spreadsheet(_: str) -> bytes:
+    # We're not interested in spreadsheets data
+    raise Unreadable
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+# noinspection PyPep8Naming
+import typing as T
+
+import aiohttp
+
+from app.acts.structures import ActToForward
+from app.core import metrics
+from app.core.retrying import CircuitBreaker, retry
+from app.core.services import ServiceException
+from app.core.settings import (
+    FORWARD_BACKOFF,
+    FORWARD_BREAKER_COOLDOWN,
+    FORWARD_BREAKER_THRESHOLD,
+    FORWARD_RETRIES,
+    FORWARD_WORKERS,
+)
+from .services import (
+    API,
+    ForwardingError,
+    ForwardingKeyError,
+    Interest,
+    TemporaryForwardingError,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class ActsForwarder:
+    """Forwards the acts to interes.shtab.net.
+
+    At most `FORWARD_WORKERS` acts of an issuer (i.e. of its API key) are
+    forwarded at a time. The temporary errors are retried, and a breaker
+    shared by all the issuers pauses the forwarding while the service keeps
+    failing. The acts refused by the service are set aside for an
+    inspection, the ones still failing after the retries are left pending.
+    Once the API key of the issuer is rejected, the rest of its acts are
+    left pending as well, without sending them.
+    """
+    RETRY_ON = (
+        asyncio.TimeoutError,
+        aiohttp.ClientError,
+        TemporaryForwardingError,
+    )
+
+    breaker = CircuitBreaker(
+        Interest.URL,
+        exceptions=RETRY_ON,
+        threshold=FORWARD_BREAKER_THRESHOLD,
+        cooldown=FORWARD_BREAKER_COOLDOWN,
+    )
+    # Of the bookkeeping requests to the `api` service
+    API_ERRORS = (ServiceException, aiohttp.ClientError, asyncio.TimeoutError)
+
+    _semaphores: T.ClassVar[T.Dict[str, asyncio.Semaphore]] = {}
+
+    def __init__(self, inform: T.Callable[[str], T.Awaitable]):
+        self.inform = inform
+        self.forwarded = 0
+        # Set aside, as the service refused them
+        self.failed = 0
+        # Left for the next run
+        self.postponed = 0
+        # Why the forwarding of the issuer stopped, if it did
+        self.stopped: T.Optional[ForwardingKeyError] = None
+
+    @classmethod
+    def _semaphore(cls, issuer: str) -> asyncio.Semaphore:
+        # Created lazily to bind them to the running loop
+        if issuer not in cls._semaphores:
+            cls._semaphores[issuer] = asyncio.Semaphore(FORWARD_WORKERS)
+        return cls._semaphores[issuer]
+
+    async def _postpone(self, act: ActToForward, inform=True) -> None:
+        """Leave the `act` pending, so the next run forwards it again."""
+        self.postponed += 1
+        metrics.FORWARDED_ACTS.labels(act.issuer, 'postponed').inc()
+        if inform:
+            await self.inform(f'Failed to forward act #{act.id}, left pending')
+
+    async def _stop(self, act: ActToForward, error: ForwardingKeyError) -> None:
+        """Leave the acts of the issuer pending, as its key is rejected."""
+        if self.stopped is None:
+            self.stopped = error
+            await self.inform(f'API key of {act.issuer} rejected: {error}')
+        await self._postpone(act, inform=False)
+
+    async def _set_aside(self, act: ActToForward, error: Exception) -> None:
+        """Keep the `act` out of the next runs until it's inspected."""
+        try:
+            await API.append_act_comments(
+                act.id,
+                f'Forwarding failed: {error}',
+                needs_inspection=True,
+            )
+        except self.API_ERRORS:
+            logger.exception(f'Error setting act #{act.id} aside')
+            await self._postpone(act)
+            return
+
+        self.failed += 1
+        metrics.FORWARDED_ACTS.labels(act.issuer, 'set aside').inc()
+        await self.inform(f'Failed to forward act #{act.id}, set aside')
+
+    async def forward(self, act: ActToForward) -> bool:
+        """Forward the `act` and mark it as forwarded.
+
+        Returns False if it wasn't forwarded. An act refused by the service
+        is set aside, the ones failing for any other reason, e.g. the
+        service being down even after the retries, are left pending. None
+        of the errors reach the pipeline, so the other acts go on.
+        """
+        async with self._semaphore(act.issuer):
+            if self.stopped is not None:
+                await self._postpone(act, inform=False)
+                return False
+
+            try:
+                await retry(
+                    lambda: self.breaker.call(
+                        lambda: Interest.forward_act(act),
+                    ),
+                    exceptions=self.RETRY_ON,
+                    attempts=FORWARD_RETRIES,
+                    backoff=FORWARD_BACKOFF,
+                    jitter=True,
+                )
+            except self.RETRY_ON:
+                logger.exception(f'Error forwarding act #{act.id}')
+                await self._postpone(act)
+                return False
+            except ForwardingKeyError as e:
+                logger.exception(f'Error forwarding act #{act.id}')
+                await self._stop(act, e)
+                return False
+            except ForwardingError as e:
+                logger.exception(f'Act #{act.id} refused')
+                await self._set_aside(act, e)
+                return False
+            except ServiceException:
+                logger.exception(f'Error forwarding act #{act.id}')
+                await self._postpone(act)
+                return False
+            except Exception:
+                logger.exception(f'Unexpected error forwarding act #{act.id}')
+                await self._postpone(act)
+                return False
+
+        try:
+            await API.change_act(act.id, forwarded=True)
+        except self.API_ERRORS:
+            # Forwarded once more by the next run
+            logger.exception(f'Error marking act #{act.id} as forwarded')
+            await self._postpone(act)
+            return False
+
+        self.forwarded += 1
+        metrics.FORWARDED_ACTS.labels(act.issuer, 'forwarded').inc()
+        return True
@@ -0,0 +1,76 @@
+"""Page by page text extraction from PDFs with poppler and tesseract."""
+import os
+import subprocess
+# noinspection PyPep8Naming
+import typing as T
+
+from app.core.settings import OCR_DPI, OCR_MAX_PAGES
+
+
+# A page without the ukrainian letter `о` is probably a scanned paper sheet
+CYRILLIC_O = 'о'.encode()
+
+# Keep tesseract single-threaded, the pages are spread across processes
+TESSERACT_ENV = {**os.environ, 'OMP_THREAD_LIMIT': '1'}
+
+
+def _run(args: T.List[str], **kwargs) -> bytes:
+    return subprocess.run(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        check=True,
+        **kwargs,
+    ).stdout
+
+
+def text_layer_pages(file_path: str) -> T.List[bytes]:
+    """Return the text layer of every page, in one `pdftotext` run."""
+    content = _run(['pdftotext', file_path, '-'])
+    # `pdftotext` ends every page with a form feed
+    pages = content.split(b'\f')
+    if pages and not pages[-1].strip():
+        pages.pop()
+    return pages
+
+
+def pages_to_ocr(
+        pages: T.Sequence[bytes],
+        max_pages: int = OCR_MAX_PAGES,
+) -> T.List[int]:
+    """Return the (1-based) numbers of the pages without a text layer."""
+    numbers = [
+        number
+        for number, text in enumerate(pages, 1)
+        if CYRILLIC_O not in text
+    ]
+    return numbers[:max_pages]
+
+
+def ocr_page(file_path: str, page: int, dpi: int = OCR_DPI) -> bytes:
+    image = _run([
+        'pdftoppm',
+        '-f', str(page),
+        '-l', str(page),
+        '-r', str(dpi),
+        '-gray',
+        '-png',
+        file_path,
+    ])
+    return _run(
+        ['tesseract', 'stdin', 'stdout', '-l', 'ukr'],
+        input=image,
+        env=TESSERACT_ENV,
+    )
+
+
+def read_pdf(file_path: str) -> bytes:
+    """Extract the text of a PDF sequentially, OCR-ing only scanned pages."""
+    pages = text_layer_pages(file_path)
+    for number in pages_to_ocr(pages):
+        pages[number - 1] = ocr_page(file_path, number)
+    return join_pages(pages)
+
+
+def join_pages(pages: T.Iterable[bytes]) -> bytes:
+    return b'\n\n'.join(page.strip() for page in pages)
@@ -1,5 +1,74 @@
-from . import (
-    dnipro,
-    sumy,
-    vinnytsia,
-)
+"""Parsers of the acts, one module per issuer.
+
+A parser module is registered when it declares:
+
+- `ISSUER`: one of the `ACT_ISSUERS` of the `api` service;
+- `BASE_URL`: the source the acts are parsed from;
+- `parse(inform, since=None)`: returns the acts published by the issuer
+  since the date (all of them for None) by `act_id`;
+- `SCHEDULE`: a `timedelta` between the scheduled runs, None to run only
+  on demand;
+- `FULL_SCAN_SCHEDULE`: a `timedelta` between the scheduled full scans,
+  which detect the acts removed from the source;
+- `CONCURRENCY`: requests to the source made at the same time;
+- `POLITENESS_DELAY`: seconds between the requests to the source.
+
+The parsers request the sources with `app.core.http_cache.open_session`,
+which keeps the politeness delays and records the responses on demand.
+"""
+import dataclasses
+import datetime
+import importlib
+import pkgutil
+# noinspection PyPep8Naming
+import typing as T
+
+import yarl
+
+from app.acts.structures import Act
+from app.core import throttling
+
+
+Parser = T.Callable[
+    [T.Callable, T.Optional[datetime.date]],
+    T.Awaitable[T.Mapping[str, Act]],
+]
+
+
+@dataclasses.dataclass(frozen=True)
+class ParserSpec:
+    issuer: str
+    parse: Parser
+    host: str
+    schedule: T.Optional[datetime.timedelta]
+    full_scan_schedule: datetime.timedelta
+    concurrency: int
+    politeness_delay: float
+
+
+def discover() -> T.Dict[str, ParserSpec]:
+    """Find the parser modules of this package by their `ISSUER`."""
+    registry = {}
+    for module_info in pkgutil.iter_modules(__path__):
+        module = importlib.import_module(f'{__name__}.{module_info.name}')
+        if not hasattr(module, 'ISSUER'):
+            continue
+
+        spec = ParserSpec(
+            issuer=module.ISSUER,
+            parse=module.parse,
+            host=yarl.URL(module.BASE_URL).host,
+            schedule=module.SCHEDULE,
+            full_scan_schedule=module.FULL_SCAN_SCHEDULE,
+            concurrency=module.CONCURRENCY,
+            politeness_delay=module.POLITENESS_DELAY,
+        )
+        if spec.issuer in registry:
+            raise ValueError(f'{spec.issuer} has more than one parser')
+        registry[spec.issuer] = spec
+        throttling.set_politeness_delay(spec.host, spec.politeness_delay)
+
+    return registry
+
+
+PARSERS = discover()
@@ -1,14 +1,12 @@
 import asyncio
 import datetime
 import logging
-from io import StringIO
 # noinspection PyPep8Naming
 import typing as T
 
-import aiohttp
-from lxml import etree
-
 from app.acts.structures import Act, Document
+from app.core.http_cache import open_session
+from .pages import RowsParser
 
 
 logger = logging.getLogger(__name__)
@@ -18,39 +16,54 @@ ISSUER = 'Dnipro'
 BASE_URL = 'https://dniprorada.gov.ua/'
 PAGE_URI = 'uk/Widgets/GetAcceptCouncilDocuments'
 MEDIA_URI = '/uk/Widgets/GetWidgetContent?url='
-# xPath cheatsheet https://devhints.io/xpath
-XPATH = '/html/body/div[2]/table/tbody/tr'
+# The full scans start from this date
+START_DATE = datetime.date(2021, 1, 1)
+SCHEDULE = datetime.timedelta(days=1)
+FULL_SCAN_SCHEDULE = datetime.timedelta(days=7)
+CONCURRENCY = 2
+POLITENESS_DELAY = 1
+# The response is the table of the acts only, so its rows are streamed
+# instead of being selected with '/html/body/div[2]/table/tbody/tr'
+ROWS = RowsParser(cells={
+    'act_id': './td[2]/text()',
+    'title': './td[5]/text()',
+    'download_pdf': './td[6]/button/@onclick',
+    'download_doc': './td[7]/button/@onclick',
+})
 
 
-async def parse(inform: T.Callable[[str], T.Awaitable]) -> T.Mapping[str, Act]:
+async def parse(
+        inform: T.Callable[[str], T.Awaitable],
+        since: datetime.date = None,
+) -> T.Mapping[str, Act]:
     await inform('Running `dnipro` parser')
 
     # Get the page with all acts
     await inform(f'Reading from {BASE_URL}')
-    async with aiohttp.ClientSession() as session:
+    async with open_session() as session:
         async with session.post(
                 BASE_URL + PAGE_URI,
                 json={
-                    "BegDocDate": "01.01.2021",
+                    "BegDocDate": (since or START_DATE).strftime('%d.%m.%Y'),
                     "EndDocDate": datetime.date.today().strftime('%d.%m.%Y'),
                 },
                 timeout=60,
         ) as response:
-            html = await response.text()
+            response.raise_for_status()
+            content = await response.read()
+            encoding = response.get_encoding()
     await inform(f'Reading from {BASE_URL} finished')
 
-    # Get the <tr> tags with the acts data
-    htmlparser = etree.HTMLParser()
-    tree = etree.parse(StringIO(html), htmlparser)
-    rows = tree.xpath(XPATH)
-
     results = {}
-    for row in rows:
-        act_id = row.xpath('./td[2]/text()')[0].strip()
-        title = row.xpath('./td[5]/text()')[0].strip()
+    for row in await ROWS.parse_async(content, encoding):
+        if not row['act_id']:
+            continue
+
+        act_id = row['act_id'][0].strip()
+        title = row['title'][0].strip() if row['title'] else ''
 
-        download_pdf = row.xpath('./td[6]/button/@onclick')
-        download_doc = row.xpath('./td[7]/button/@onclick')
+        download_pdf = row['download_pdf']
+        download_doc = row['download_doc']
         if download_doc:
             url = BASE_URL + MEDIA_URI + download_doc[0].split('\'')[1]
         elif download_pdf:
@@ -0,0 +1,109 @@
+"""Rows extraction from the HTML pages of the sources.
+
+The pages are fed to lxml as raw bytes and the cells are read with
+precompiled XPaths. Big pages are parsed off the event loop.
+"""
+import asyncio
+import io
+import threading
+# noinspection PyPep8Naming
+import typing as T
+
+from lxml import etree
+
+
+# Pages of this size (bytes) and bigger are parsed in a thread
+OFF_LOOP_SIZE = 256 * 1024
+
+Row = T.Dict[str, T.List[str]]
+
+_local = threading.local()
+
+
+def _html_parser(encoding: T.Optional[str]) -> etree.HTMLParser:
+    # The lxml parsers can't be shared between the threads
+    parsers = _local.__dict__.setdefault('parsers', {})
+    parser = parsers.get(encoding)
+    if parser is None:
+        parser = parsers[encoding] = etree.HTMLParser(encoding=encoding)
+    return parser
+
+
+class RowsParser:
+    """Extracts the `cells` of every table row of a page.
+
+    The rows are either selected by the `rows` XPath from the whole tree,
+    or, without it, streamed one by one: every `<tr>` of the `<tbody>`s is
+    handled and dropped as soon as it's parsed, so the tree of a huge page
+    is never built. Streaming takes a bit longer, but a fraction of the
+    memory.
+    """
+
+    def __init__(self, cells: T.Mapping[str, str], rows: str = None):
+        self.cells = {
+            name: etree.XPath(xpath, smart_strings=False)
+            for name, xpath in cells.items()
+        }
+        self.rows = None if rows is None else etree.XPath(rows)
+
+    def _extract(self, row: etree.ElementBase) -> Row:
+        return {name: xpath(row) for name, xpath in self.cells.items()}
+
+    def _parse_tree(
+            self,
+            content: bytes,
+            encoding: str = 'utf-8',
+    ) -> T.List[Row]:
+        root = etree.fromstring(content, _html_parser(encoding))
+        if root is None:
+            return []
+        return [self._extract(row) for row in self.rows(root)]
+
+    def _stream(
+            self,
+            content: bytes,
+            encoding: str = 'utf-8',
+    ) -> T.List[Row]:
+        rows = []
+        events = etree.iterparse(
+            io.BytesIO(content),
+            tag='tr',
+            html=True,
+            encoding=encoding,
+        )
+        for _, row in events:
+            parent = row.getparent()
+            if parent is not None and parent.tag == 'tbody':
+                rows.append(self._extract(row))
+
+            # Drop the handled rows
+            row.clear()
+            while row.getprevious() is not None:
+                del parent[0]
+
+        return rows
+
+    def parse(
+            self,
+            content: bytes,
+            encoding: str = 'utf-8',
+    ) -> T.List[Row]:
+        if self.rows is None:
+            return self._stream(content, encoding)
+        return self._parse_tree(content, encoding)
+
+    async def parse_async(
+            self,
+            content: bytes,
+            encoding: str = 'utf-8',
+    ) -> T.List[Row]:
+        if len(content) < OFF_LOOP_SIZE:
+            return self.parse(content, encoding)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            self.parse,
+            content,
+            encoding,
+        )
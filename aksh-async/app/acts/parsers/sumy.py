@@ -1,13 +1,12 @@
+import datetime
 import logging
 import pathlib
-from io import StringIO
 # noinspection PyPep8Naming
 import typing as T
 
-import aiohttp
-from lxml import etree
-
 from app.acts.structures import Act, Document
+from app.core.http_cache import open_session
+from .pages import Row, RowsParser
 
 
 logger = logging.getLogger(__name__)
@@ -17,40 +16,41 @@ ISSUER = 'Sumy'
 MEDIA_DIR = pathlib.Path(f'/api-data/acts/{ISSUER}')
 BASE_URL = 'https://smr.gov.ua'
 # noinspection SpellCheckingInspection
-PAGE_URI = '/uk/dokumenti/rishennya-miskoji-radi/2021.html'
+PAGE_URI = '/uk/dokumenti/rishennya-miskoji-radi/{year}.html'
+# The full scans start from this year
+START_YEAR = 2021
+SCHEDULE = datetime.timedelta(days=1)
+FULL_SCAN_SCHEDULE = datetime.timedelta(days=7)
+CONCURRENCY = 4
+POLITENESS_DELAY = 1
 # xPath cheatsheet https://devhints.io/xpath
 XPATH = '/html/body/div[3]/div/div[2]/div[1]/div/div[2]/div/div/div/div[4]' \
         '/div[2]/div/table/tbody/tr[position()>=2]'
 
-MEDIA_DIR.mkdir(exist_ok=True, parents=True)
-
+ROWS = RowsParser(
+    rows=XPATH,
+    cells={
+        'act_id': './td[1]/text()',
+        'title': './td[2]//text()',
+        # The <a> tags with the documents
+        'uris': './td[2]//@href',
+    },
+)
 
-async def parse(inform: T.Callable[[str], T.Awaitable]) -> T.Mapping[str, Act]:
-    await inform('Running `sumy` parser')
-
-    # Get the page with all acts
-    await inform(f'Reading from {BASE_URL}')
-    async with aiohttp.ClientSession() as session:
-        async with session.get(BASE_URL + PAGE_URI, timeout=10) as response:
-            html = await response.text()
-    await inform(f'Reading from {BASE_URL} finished')
+MEDIA_DIR.mkdir(exist_ok=True, parents=True)
 
-    # Get the <a> tags with the acts data
-    htmlparser = etree.HTMLParser()
-    tree = etree.parse(StringIO(html), htmlparser)
-    rows = tree.xpath(XPATH)
 
+def _parse_page(rows: T.Iterable[Row]) -> T.Dict[str, Act]:
     results = {}
     for row in rows:
-        uris = row.xpath('./td[2]//@href')
-        if not uris:
+        if not row['uris']:
             continue
 
-        act_id = row.xpath('./td[1]/text()')[0].strip()
-        title = row.xpath('./td[2]//text()')[0].strip()
+        act_id = row['act_id'][0].strip()
+        title = row['title'][0].strip()
         documents = [
             Document(order=i, url=BASE_URL + uri.strip())
-            for i, uri in enumerate(uris)
+            for i, uri in enumerate(row['uris'])
         ]
 
         results[act_id] = Act(
@@ -59,6 +59,34 @@ async def parse(inform: T.Callable[[str], T.Awaitable]) -> T.Mapping[str, Act]:
             title=title,
             documents=documents,
         )
+
+    return results
+
+
+async def parse(
+        inform: T.Callable[[str], T.Awaitable],
+        since: datetime.date = None,
+) -> T.Mapping[str, Act]:
+    await inform('Running `sumy` parser')
+
+    # The acts are listed on a page per year
+    first_year = START_YEAR if since is None else since.year
+    results = {}
+    async with open_session() as session:
+        for year in range(first_year, datetime.date.today().year + 1):
+            url = BASE_URL + PAGE_URI.format(year=year)
+            await inform(f'Reading from {url}')
+            async with session.get(url, timeout=10) as response:
+                if response.status == 404:
+                    # The page of a new year may not be published yet
+                    await inform(f'No acts page for {year}')
+                    continue
+                response.raise_for_status()
+                content = await response.read()
+                encoding = response.get_encoding()
+
+            rows = await ROWS.parse_async(content, encoding)
+            results.update(_parse_page(rows))
     await inform('Running `sumy` parser finished')
 
     return results
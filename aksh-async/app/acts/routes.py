@@ -1,28 +1,29 @@
-import asyncio
-
 from fastapi import APIRouter, WebSocket
 
-from . import parsers
-from .acts_processors import ActsProcessor
+from app.jobs.manager import manager
 
 
 router = APIRouter()
 
 
 async def ws(websocket: WebSocket):
+    """Start the runs and follow their progress.
+
+    Sending an issuer starts only its run, anything else starts the runs of
+    every issuer.
+    """
     await websocket.accept()
-    await websocket.receive_text()
-
-    queue = asyncio.Queue()
-    acts_processor = ActsProcessor(
-        queue,
-        (parsers.sumy.ISSUER, parsers.sumy.parse),
-        (parsers.dnipro.ISSUER, parsers.dnipro.parse),
-    )
-    asyncio.ensure_future(acts_processor.do_the_job())
-
-    while True:
-        message: dict = await queue.get()
-        if message.get('done', False):
-            break
-        await websocket.send_json(message)
+    text = await websocket.receive_text()
+    issuers = [text] if text in manager.parsers else list(manager.parsers)
+
+    with manager.progress.subscribe() as subscription:
+        # The issuers which are running already are just followed
+        for issuer in issuers:
+            await manager.start(issuer)
+
+        while True:
+            # Only the latest progress of a stage waits for a slow client
+            event = await subscription.get()
+            if event.type == 'idle' and not manager.running:
+                break
+            await websocket.send_json(event.to_dict())
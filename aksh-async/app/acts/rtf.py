@@ -0,0 +1,107 @@
+"""In-process RTF to text conversion."""
+import re
+
+
+PATTERN = re.compile(
+    r"\\([a-z]{1,32})(-?\d{1,10})?[ ]?"
+    r"|\\'([0-9a-f]{2})"
+    r"|\\([^a-z])"
+    r"|([{}])"
+    r"|[\r\n]+"
+    r"|(.)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Groups which don't contain the document text
+# noinspection SpellCheckingInspection
+DESTINATIONS = {
+    'author', 'buptim', 'colortbl', 'comment', 'creatim', 'datastore',
+    'doccomm', 'fonttbl', 'footer', 'footerf', 'footerl', 'footerr',
+    'footnote', 'generator', 'header', 'headerf', 'headerl', 'headerr',
+    'info', 'keywords', 'latentstyles', 'listoverridetable', 'listtable',
+    'object', 'operator', 'pict', 'printim', 'private', 'revtbl', 'rsidtbl',
+    'stylesheet', 'subject', 'themedata', 'title', 'xmlnstbl',
+}
+
+# noinspection SpellCheckingInspection
+SPECIAL_CHARACTERS = {
+    'par': '\n',
+    'sect': '\n\n',
+    'page': '\n\n',
+    'line': '\n',
+    'row': '\n',
+    'tab': '\t',
+    'cell': '\t',
+    'emdash': '\u2014',
+    'endash': '\u2013',
+    'emspace': '\u2003',
+    'enspace': '\u2002',
+    'qmspace': '\u2005',
+    'bullet': '\u2022',
+    'lquote': '\u2018',
+    'rquote': '\u2019',
+    'ldblquote': '\u201c',
+    'rdblquote': '\u201d',
+}
+
+
+def rtf_to_text(rtf: str) -> str:
+    """Return the text of the `rtf` document.
+
+    The `rtf` is expected to be decoded as latin-1, so the escaped 8-bit
+    characters are decoded with the code page declared by the document.
+    """
+    stack = []
+    ignorable = False
+    # Characters to skip after an `\uN` (its non-unicode replacement)
+    uc_skip = 1
+    skip = 0
+    encoding = 'cp1252'
+    out = []
+
+    for match in PATTERN.finditer(rtf):
+        word, arg, hex_, char, brace, text = match.groups()
+        if brace:
+            skip = 0
+            if brace == '{':
+                stack.append((uc_skip, ignorable))
+            elif stack:
+                uc_skip, ignorable = stack.pop()
+        elif char:
+            skip = 0
+            if char == '*':
+                ignorable = True
+            elif ignorable:
+                pass
+            elif char == '~':
+                out.append('\xa0')
+            elif char in '{}\\':
+                out.append(char)
+        elif word:
+            skip = 0
+            if word in DESTINATIONS:
+                ignorable = True
+            elif word == 'ansicpg':
+                encoding = f'cp{arg}'
+            elif word == 'uc':
+                uc_skip = int(arg)
+            elif ignorable:
+                pass
+            elif word in SPECIAL_CHARACTERS:
+                out.append(SPECIAL_CHARACTERS[word])
+            elif word == 'u':
+                code = int(arg)
+                out.append(chr(code + 0x10000 if code < 0 else code))
+                skip = uc_skip
+        elif hex_:
+            if skip:
+                skip -= 1
+            elif not ignorable:
+                out.append(bytes((int(hex_, 16),)).decode(encoding, 'replace'))
+        elif text:
+            if skip:
+                skip -= 1
+            elif not ignorable:
+                out.append(text)
+
+    return ''.join(out)
@@ -1,4 +1,3 @@
-import base64
 import logging
 # noinspection PyPep8Naming
 import typing as T
@@ -10,29 +9,59 @@ from app.core.settings import INTERESTS_API_KEYS
 
 logger = logging.getLogger(__name__)
 
+# Between the texts of the files of one act
+FILES_SEPARATOR = b'.\n\n\n'
+
 
 class API(services.API):
+    @classmethod
+    async def iter_acts(cls, **params) -> T.AsyncIterator[Act]:
+        async for page in cls.iter_pages('acts/acts/', **params):
+            for a in page:
+                yield Act.from_dict(a)
+
     @classmethod
     async def fetch_acts(cls, **params) -> T.List[Act]:
-        response = await cls.get('acts/acts/', params=params)
+        return [act async for act in cls.iter_acts(**params)]
+
+    @classmethod
+    async def count_acts(cls, **params) -> int:
+        response = await cls.get('acts/acts/count/', params=params)
         if not response.ok:
-            error_text = f'Error retrieving acts from {cls.URL}'
+            error_text = f'Error counting acts in {cls.URL}'
             raise services.ServiceException(error_text)
 
-        return [Act(**a) for a in response.data]
+        return response.data['count']
 
     @classmethod
-    async def create_act(cls, act: Act) -> Act:
-        data = act.dict(
-            exclude={'id', 'created', 'updated'},
-            exclude_unset=True,
-        )
-        response = await cls.post('acts/acts/', data=data)
+    async def sync_acts(
+            cls,
+            issuer: str,
+            acts: T.Iterable[Act],
+            partial: bool = False,
+    ) -> T.Dict[str, int]:
+        """Reconcile the stored acts of the `issuer` with the parsed ones.
+
+        Returns the amounts of created, removed, restored and unchanged acts.
+        A `partial` sync doesn't remove the acts missing from `acts`.
+        """
+        data = {
+            'issuer': issuer,
+            'partial': partial,
+            'acts': [
+                act.to_dict(
+                    ('act_id', 'title', 'documents'),
+                    ('order', 'url'),
+                )
+                for act in acts
+            ],
+        }
+        response = await cls.post('acts/acts/sync/', data=data, timeout=120)
         if not response.ok:
-            error_text = f'Error creating act {act.act_id}: {act.title}'
+            error_text = f'Error syncing {issuer} acts in {cls.URL}'
             raise services.ServiceException(error_text)
 
-        return Act(**response.data)
+        return response.data
 
     @classmethod
     async def change_act(cls, pk: int, /, files=None, **data) -> Act:
@@ -41,25 +70,31 @@ class API(services.API):
             error_text = f'Error changing act with pk={pk} in {cls.URL}'
             raise services.ServiceException(error_text)
 
-        return Act(**response.data)
+        return Act.from_dict(response.data)
 
     @classmethod
-    async def fetch_acts_to_forward(cls) -> T.List[ActToForward]:
-        response = await cls.get('acts/acts-to-forward/', timeout=20)
+    async def append_act_comments(cls, pk: int, /, line: str, **data) -> Act:
+        """Add a `line` to the `comments` of an act, keeping the others."""
+        uri = f'acts/acts/{pk}/'
+        response = await cls.get(uri, params={'fields': 'comments'})
         if not response.ok:
-            error_text = f'Error retrieving acts to follow from {cls.URL}'
+            error_text = f'Error retrieving act with pk={pk} from {cls.URL}'
             raise services.ServiceException(error_text)
 
-        return [ActToForward(**r) for r in response.data]
+        comments = response.data.get('comments')
+        if comments:
+            line = f'{comments}\n{line}'
+        return await cls.change_act(pk, comments=line, **data)
 
     @classmethod
-    async def fetch_documents(cls, /, **params) -> T.List[Document]:
-        response = await cls.get(f'acts/documents/', params=params)
-        if not response.ok:
-            error_text = f'Error retrieving documents from {cls.URL}'
-            raise services.ServiceException(error_text)
+    async def iter_documents(cls, /, **params) -> T.AsyncIterator[Document]:
+        async for page in cls.iter_pages('acts/documents/', **params):
+            for r in page:
+                yield Document.from_dict(r)
 
-        return [Document(**r) for r in response.data]
+    @classmethod
+    async def fetch_documents(cls, /, **params) -> T.List[Document]:
+        return [document async for document in cls.iter_documents(**params)]
 
     @classmethod
     async def change_document(cls, pk: int, /, files=None, **data) -> Document:
@@ -69,16 +104,40 @@ class API(services.API):
             error_text = f'Error changing document with pk={pk} in {cls.URL}'
             raise services.ServiceException(error_text)
 
-        return Document(**response.data)
+        return Document.from_dict(response.data)
+
+
+class ForwardingError(services.ServiceException):
+    """interes.shtab.net refused the act."""
+
+
+class TemporaryForwardingError(ForwardingError):
+    """interes.shtab.net failed or throttled, the act may be retried."""
+
+
+class ForwardingKeyError(services.ServiceException):
+    """interes.shtab.net rejected the API key of the issuer."""
 
 
 class Interest(services.Interest):
+    # Statuses of the acts which are refused whenever they are sent
+    REFUSED_STATUSES = (400, 413, 422)
+    TEMPORARY_STATUSES = (408, 429)
+    KEY_STATUSES = (401, 403)
+
     @classmethod
     async def forward_act(cls, act: ActToForward) -> None:
         headers = {'Authorization': INTERESTS_API_KEYS[act.issuer]}
-        data = act.dict(include={'title', 'link', 'file_name', 'file_content'})
-        data['file_content'] = base64.b64encode(data['file_content']).decode()
-        data['file_name'] = data['file_name'] + '.txt'
+        data = services.Base64JSONPayload(
+            {
+                'title': act.title,
+                'link': act.link,
+                'file_name': act.file_name + '.txt',
+            },
+            'file_content',
+            act.file_contents,
+            separator=FILES_SEPARATOR,
+        )
 
         response = await cls.post(
             'api/document/push',
@@ -90,5 +149,17 @@ class Interest(services.Interest):
             logger.error(f'Error forwarding act #{act.id}')
             logger.error(f'Status: {response.status}')
             logger.error(f'Content: {str(response.data)}')
-            error_text = f'Error forwarding act: {act.title}: {act.link}'
+            error_text = (
+                f'Error {response.status} forwarding act: '
+                f'{act.title}: {act.link}'
+            )
+            if response.status in cls.REFUSED_STATUSES:
+                raise ForwardingError(error_text)
+            if response.status in cls.KEY_STATUSES:
+                raise ForwardingKeyError(error_text)
+            if (
+                    response.status >= 500
+                    or response.status in cls.TEMPORARY_STATUSES
+            ):
+                raise TemporaryForwardingError(error_text)
             raise services.ServiceException(error_text)
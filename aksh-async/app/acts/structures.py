@@ -1,24 +1,83 @@
+"""The acts data passed between the stages of the runs.
+
+These are built for every row of the `api` responses and of the parsed
+pages, so they are plain slotted dataclasses trusted as they are: the `api`
+service validates everything it stores and returns, and the acts of the
+parsers are checked once with `Act.validate`.
+"""
+import dataclasses
 from datetime import datetime
 # noinspection PyPep8Naming
 import typing as T
 
-from pydantic import BaseModel
+from app.core.utils import slotted
+
+
+def parse_datetime(value: T.Optional[str]) -> T.Optional[datetime]:
+    if value is None:
+        return None
+    # `fromisoformat` of Python 3.9 doesn't read the "Z" of the `api`
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+
+def _set_fields(
+        structure: T.Any,
+        fields: T.Iterable[str],
+) -> T.Dict[str, T.Any]:
+    return {
+        name: value
+        for name in fields
+        if (value := getattr(structure, name)) is not None
+    }
 
 
-class Document(BaseModel):
-    order: str
+@slotted
+@dataclasses.dataclass
+class Document:
+    order: int
     url: str
 
     act: int = None
     file: str = None
     last_modified: datetime = None
+    etag: str = None
+    sha256: str = None
 
     id: int = None
     created: datetime = None
     updated: datetime = None
 
+    @classmethod
+    def from_dict(cls, data: T.Mapping[str, T.Any]) -> 'Document':
+        document = cls(**{
+            name: value
+            for name, value in data.items()
+            if name in _DOCUMENT_FIELD_NAMES
+        })
+        document.last_modified = parse_datetime(document.last_modified)
+        document.created = parse_datetime(document.created)
+        document.updated = parse_datetime(document.updated)
+        return document
 
-class Act(BaseModel):
+    def to_dict(
+            self,
+            fields: T.Iterable[str] = None,
+    ) -> T.Dict[str, T.Any]:
+        """The `fields` (all by default) which are not None."""
+        return _set_fields(self, fields or _DOCUMENT_FIELDS)
+
+
+_DOCUMENT_FIELDS = tuple(
+    field.name for field in dataclasses.fields(Document)
+)
+_DOCUMENT_FIELD_NAMES = frozenset(_DOCUMENT_FIELDS)
+
+
+@slotted
+@dataclasses.dataclass
+class Act:
     issuer: str
     act_id: str
     title: str
@@ -33,8 +92,63 @@ class Act(BaseModel):
     created: datetime = None
     updated: datetime = None
 
+    @classmethod
+    def from_dict(cls, data: T.Mapping[str, T.Any]) -> 'Act':
+        act = cls(**{
+            name: value
+            for name, value in data.items()
+            if name in _ACT_FIELD_NAMES
+        })
+        act.documents = [
+            Document.from_dict(document)
+            for document in act.documents
+        ]
+        act.created = parse_datetime(act.created)
+        act.updated = parse_datetime(act.updated)
+        return act
+
+    def to_dict(
+            self,
+            fields: T.Iterable[str] = None,
+            document_fields: T.Iterable[str] = None,
+    ) -> T.Dict[str, T.Any]:
+        """The `fields` (all by default) which are not None."""
+        data = _set_fields(self, fields or _ACT_FIELDS)
+        if 'documents' in data:
+            data['documents'] = [
+                document.to_dict(document_fields)
+                for document in self.documents
+            ]
+        return data
 
-class ActToForward(BaseModel):
+    def validate(self) -> None:
+        """Check an act built by a parser, the `api` would reject it."""
+        if not isinstance(self.act_id, str) or not self.act_id:
+            raise ValueError(f'{self.issuer} act without act_id')
+        if not isinstance(self.title, str) or not self.title:
+            raise ValueError(f'{self.issuer} act {self.act_id} without title')
+        if not self.documents:
+            raise ValueError(f'{self.issuer} act {self.act_id} without files')
+        for document in self.documents:
+            if not isinstance(document.order, int) or document.order < 0:
+                raise ValueError(
+                    f'{self.issuer} act {self.act_id} has a document with '
+                    f'order {document.order!r}',
+                )
+            if not isinstance(document.url, str) or not document.url:
+                raise ValueError(
+                    f'{self.issuer} act {self.act_id} has a document '
+                    f'without url',
+                )
+
+
+_ACT_FIELDS = tuple(field.name for field in dataclasses.fields(Act))
+_ACT_FIELD_NAMES = frozenset(_ACT_FIELDS)
+
+
+@slotted
+@dataclasses.dataclass
+class ActToForward:
     id: int
     issuer: str
     title: str
@@ -42,4 +156,40 @@ class ActToForward(BaseModel):
     file_name: str
     files: T.List[str]
 
-    file_content: bytes = None
+    # The extracted texts of the `files`, forwarded joined
+    file_contents: T.List[bytes] = None
+
+    @classmethod
+    def from_dict(cls, data: T.Mapping[str, T.Any]) -> 'ActToForward':
+        return cls(**{
+            name: value
+            for name, value in data.items()
+            if name in _ACT_TO_FORWARD_FIELD_NAMES
+        })
+
+    def to_dict(
+            self,
+            fields: T.Iterable[str] = None,
+    ) -> T.Dict[str, T.Any]:
+        """The `fields` (all by default) which are not None."""
+        return _set_fields(self, fields or _ACT_TO_FORWARD_FIELDS)
+
+    @classmethod
+    def from_act(cls, act: Act) -> 'ActToForward':
+        """Mirrors `ActToForwardSerializer` of the `api` service."""
+        documents = sorted(act.documents, key=lambda d: d.order)
+        main_document = documents[0]
+        return cls(
+            id=act.id,
+            issuer=act.issuer,
+            title=act.title,
+            link=main_document.url,
+            file_name=main_document.file.rsplit('/', 1)[-1],
+            files=[document.file for document in documents],
+        )
+
+
+_ACT_TO_FORWARD_FIELDS = tuple(
+    field.name for field in dataclasses.fields(ActToForward)
+)
+_ACT_TO_FORWARD_FIELD_NAMES = frozenset(_ACT_TO_FORWARD_FIELDS)
@@ -0,0 +1,36 @@
+import unittest
+
+from .rtf import rtf_to_text
+
+
+class RtfToTextTestCase(unittest.TestCase):
+    def test_text(self):
+        rtf = r'{\rtf1\ansi{\fonttbl{\f0 Arial;}}\f0 First\par Second\tab end}'
+
+        self.assertEqual(rtf_to_text(rtf), 'First\nSecond\tend')
+
+    def test_code_page(self):
+        # "Рішення" in cp1251
+        rtf = r"{\rtf1\ansi\ansicpg1251 \'d0\'B3\'f8\'e5\'ed\'ed\'ff}"
+
+        self.assertEqual(rtf_to_text(rtf), 'Рішення')
+
+    def test_unicode(self):
+        # Every `\uN` is followed by `\ucN` replacement characters for the
+        # older readers, the negative ones are above 32767
+        rtf = r'{\rtf1 \u1056?\u1110?\uc2\u1096??\u-4001?? end}'
+
+        self.assertEqual(rtf_to_text(rtf), 'Ріш\uf05f end')
+
+    def test_ignored_groups(self):
+        rtf = (
+            r'{\rtf1{\info{\title T}{\author A}}'
+            r'{\*\generator G;}{\*\unknown U}Text}'
+        )
+
+        self.assertEqual(rtf_to_text(rtf), 'Text')
+
+    def test_escaped_characters(self):
+        rtf = r'{\rtf1 \{a\}\\b\~c\emdash d}'
+
+        self.assertEqual(rtf_to_text(rtf), '{a}\\b\xa0c—d')
@@ -0,0 +1,55 @@
+import hashlib
+import os
+import pathlib
+# noinspection PyPep8Naming
+import typing as T
+import uuid
+
+from app.core.settings import TEXT_CACHE_DIR
+
+
+# Bump to drop the texts extracted by the older versions of the extractors
+VERSION = 1
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: T.Union[str, pathlib.Path]) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        while chunk := file.read(CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class TextCache:
+    """Extracted texts stored on disk once per file content.
+
+    A changed file gets a new hash, so its stale text is never returned.
+    """
+
+    def __init__(self, directory: pathlib.Path = TEXT_CACHE_DIR):
+        self.directory = directory / f'v{VERSION}'
+
+    def _path(self, sha256: str) -> pathlib.Path:
+        return self.directory / sha256[:2] / f'{sha256}.txt'
+
+    def get(self, sha256: str) -> T.Optional[bytes]:
+        try:
+            return self._path(sha256).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, sha256: str, content: bytes) -> None:
+        path = self._path(sha256)
+        path.parent.mkdir(exist_ok=True, parents=True)
+        # Write aside and rename, so readers never see a partial text
+        tmp_path = path.with_name(f'.{uuid.uuid4().hex}')
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+
+    def get_for_file(self, file_path: str) -> T.Optional[bytes]:
+        return self.get(file_sha256(file_path))
+
+
+cache = TextCache()
@@ -0,0 +1,336 @@
+"""Sessions of the sources sites, with the record and replay of responses.
+
+The parsers and the downloader request the sources through `open_session`.
+With `HTTP_CACHE` set, the responses are kept on disk, keyed by the method,
+the URL and the body of the request, so the repeated development runs and
+the benchmarks don't request the sources again, or work offline at all.
+"""
+import asyncio
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import pathlib
+import time
+import urllib.parse
+import uuid
+# noinspection PyPep8Naming
+import typing as T
+
+import aiohttp
+import yarl
+from aiofile import async_open
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from app.core import metrics
+from app.core.settings import (
+    HTTP_CACHE,
+    HTTP_CACHE_DIR,
+    HTTP_CACHE_MAX_SIZE,
+    HTTP_CACHE_TTL,
+)
+from app.core.throttling import throttling_trace_config
+
+
+class CacheMiss(aiohttp.ClientError):
+    """The response isn't cached and the sources can't be requested."""
+
+
+class CachedContent:
+    """The part of `aiohttp.StreamReader` used to read the responses."""
+
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def read(self, n: int = -1) -> bytes:
+        return self._body
+
+    async def iter_chunked(self, n: int) -> T.AsyncIterator[bytes]:
+        for start in range(0, len(self._body), n):
+            yield self._body[start:start + n]
+
+
+class CachedResponse:
+    """A response read in full, which quacks like `aiohttp.ClientResponse`."""
+
+    def __init__(
+            self,
+            method: str,
+            url: str,
+            status: int,
+            reason: str,
+            headers: T.List[T.Tuple[str, str]],
+            encoding: str,
+            body: bytes,
+    ):
+        self.method = method
+        self.url = yarl.URL(url)
+        self.status = status
+        self.reason = reason
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.encoding = encoding
+        self.content = CachedContent(body)
+        self._body = body
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    @property
+    def request_info(self) -> aiohttp.RequestInfo:
+        headers = CIMultiDictProxy(CIMultiDict())
+        return aiohttp.RequestInfo(self.url, self.method, headers, self.url)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise aiohttp.ClientResponseError(
+                self.request_info,
+                (),
+                status=self.status,
+                message=self.reason,
+                headers=self.headers,
+            )
+
+    def get_encoding(self) -> str:
+        return self.encoding
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str = None) -> str:
+        return self._body.decode(encoding or self.encoding)
+
+    async def json(self, **_) -> T.Any:
+        return json.loads(await self.text())
+
+    def release(self) -> None:
+        pass
+
+    def dump(self) -> bytes:
+        """The meta data line followed by the body."""
+        meta = {
+            'method': self.method,
+            'url': str(self.url),
+            'status': self.status,
+            'reason': self.reason,
+            'headers': list(self.headers.items()),
+            'encoding': self.encoding,
+            'created': time.time(),
+        }
+        return json.dumps(meta).encode() + b'\n' + self._body
+
+    @classmethod
+    def load(cls, dump: bytes) -> T.Tuple['CachedResponse', float]:
+        """Return the response of the `dump` and the time it was created."""
+        meta, body = dump.split(b'\n', 1)
+        meta = json.loads(meta)
+        created = meta.pop('created')
+        return cls(**meta, body=body), created
+
+
+class HTTPCache:
+    """The responses kept in a directory, one file per request."""
+
+    def __init__(
+            self,
+            directory: pathlib.Path,
+            ttl: float,
+            max_size: int,
+            replay: bool = False,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        self.replay = replay
+        self._size: T.Optional[int] = None
+
+    @staticmethod
+    def key(method: str, url: str, body: bytes) -> str:
+        hasher = hashlib.sha256(f'{method.upper()} {url}\n'.encode())
+        hasher.update(body)
+        return hasher.hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory / key
+
+    async def load(self, key: str) -> T.Optional[CachedResponse]:
+        path = self._path(key)
+        try:
+            async with async_open(path, 'rb') as file:
+                response, created = CachedResponse.load(await file.read())
+        except FileNotFoundError:
+            return None
+
+        if not self.replay and time.time() - created > self.ttl:
+            return None
+
+        # The modification time orders the eviction
+        with contextlib.suppress(FileNotFoundError):
+            path.touch()
+        return response
+
+    async def save(self, key: str, response: CachedResponse) -> None:
+        self.directory.mkdir(exist_ok=True, parents=True)
+        path = self._path(key)
+        temporary_path = path.with_name(f'.{uuid.uuid4().hex}')
+        dump = response.dump()
+        async with async_open(temporary_path, 'wb') as file:
+            await file.write(dump)
+        temporary_path.replace(path)
+
+        if self._size is None:
+            self._size = await self._run(self._measure)
+        else:
+            self._size += len(dump)
+        if self._size > self.max_size:
+            self._size = await self._run(self._evict)
+
+    @staticmethod
+    async def _run(func: T.Callable[[], int]) -> int:
+        # Walking a big directory takes a while
+        return await asyncio.get_running_loop().run_in_executor(None, func)
+
+    def _files(self) -> T.List[T.Tuple[pathlib.Path, os.stat_result]]:
+        return [
+            (path, path.stat())
+            for path in self.directory.iterdir()
+            if not path.name.startswith('.')
+        ]
+
+    def _measure(self) -> int:
+        return sum(stat.st_size for _, stat in self._files())
+
+    def _evict(self) -> int:
+        """Remove the least recently used responses above `max_size`."""
+        files = sorted(self._files(), key=lambda file: file[1].st_mtime)
+        size = sum(stat.st_size for _, stat in files)
+        for path, stat in files:
+            if size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            size -= stat.st_size
+
+        return size
+
+
+def _request_body(data: T.Any, json_data: T.Any) -> bytes:
+    if json_data is not None:
+        return json.dumps(json_data, sort_keys=True).encode()
+    if data is None:
+        return b''
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, str):
+        return data.encode()
+    if isinstance(data, T.Mapping):
+        return urllib.parse.urlencode(sorted(data.items())).encode()
+    raise TypeError(f'Requests with {type(data)} data are not cached')
+
+
+class RecordingSession:
+    """Requests the sources through a `session`, unless `cache` has them.
+
+    Only the successful and the client error responses are cached, the
+    requests are answered with `CachedResponse` read in full.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, cache: HTTPCache):
+        self.session = session
+        self.cache = cache
+
+    @property
+    def closed(self) -> bool:
+        return self.session.closed
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    async def __aenter__(self) -> 'RecordingSession':
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def _request(
+            self,
+            method: str,
+            url: str,
+            *,
+            params: T.Mapping[str, str] = None,
+            data: T.Any = None,
+            json: T.Any = None,
+            **kwargs,
+    ) -> CachedResponse:
+        url = yarl.URL(url)
+        if params:
+            url = url.update_query(params)
+        key = self.cache.key(method, str(url), _request_body(data, json))
+
+        response = await self.cache.load(key)
+        if response is not None:
+            return response
+        if self.cache.replay:
+            raise CacheMiss(f'{method.upper()} {url} is not recorded')
+
+        async with self.session.request(
+                method,
+                url,
+                data=data,
+                json=json,
+                **kwargs,
+        ) as live_response:
+            response = CachedResponse(
+                method=method.upper(),
+                url=str(url),
+                status=live_response.status,
+                reason=live_response.reason or '',
+                headers=list(live_response.headers.items()),
+                body=await live_response.read(),
+                encoding=live_response.get_encoding(),
+            )
+
+        # The rest depends on the request headers or is a temporary error
+        if response.status < 500 and response.status != 304:
+            await self.cache.save(key, response)
+        return response
+
+    @contextlib.asynccontextmanager
+    async def request(
+            self,
+            method: str,
+            url: str,
+            **kwargs,
+    ) -> T.AsyncIterator[CachedResponse]:
+        yield await self._request(method, url, **kwargs)
+
+    get = functools.partialmethod(request, 'get')
+    post = functools.partialmethod(request, 'post')
+
+
+Session = T.Union[aiohttp.ClientSession, RecordingSession]
+
+cache = HTTPCache(
+    HTTP_CACHE_DIR,
+    ttl=HTTP_CACHE_TTL,
+    max_size=HTTP_CACHE_MAX_SIZE,
+    replay=HTTP_CACHE == 'replay',
+)
+
+
+def open_session(limit: int = 100, endpoint: str = 'pages') -> Session:
+    """Open a session to the sources, throttled per host.
+
+    Only the requests which actually reach a source wait for its bucket,
+    and they are measured as the `endpoint` of the source once they got it.
+    """
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=limit),
+        trace_configs=[
+            throttling_trace_config(),
+            metrics.http_trace_config(endpoint),
+        ],
+    )
+    if HTTP_CACHE in ('record', 'replay'):
+        return RecordingSession(session, cache)
+    return session
@@ -0,0 +1,41 @@
+"""JSON of the services, with orjson when it's installed.
+
+Both functions work with bytes, the stdlib `json` is used the same way as
+a fallback.
+"""
+import datetime
+import json
+# noinspection PyPep8Naming
+import typing as T
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(value: T.Any) -> T.Any:
+    # orjson encodes these natively
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    def dumps(value: T.Any) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(data: T.Union[bytes, str]) -> T.Any:
+        return orjson.loads(data)
+
+else:
+    def dumps(value: T.Any) -> bytes:
+        return json.dumps(
+            value,
+            default=_default,
+            ensure_ascii=False,
+            separators=(',', ':'),
+        ).encode()
+
+    def loads(data: T.Union[bytes, str]) -> T.Any:
+        return json.loads(data)
@@ -0,0 +1,165 @@
+"""Prometheus metrics of the services, the parsers and the pipeline.
+
+They are served in the Prometheus text format by `endpoint`.
+"""
+import re
+import time
+# noinspection PyPep8Naming
+import typing as T
+
+import aiohttp
+import prometheus_client
+from fastapi import Response
+from prometheus_client.core import CounterMetricFamily
+
+
+# Seconds, from a cached text to the OCR of a long scan
+EXTRACTION_BUCKETS = (.01, .05, .1, .5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+HTTP_REQUEST_SECONDS = prometheus_client.Histogram(
+    'aksh_http_request_seconds',
+    'Seconds to get the response headers, by service host and endpoint.',
+    ('service', 'endpoint', 'method', 'status'),
+)
+HTTP_RESPONSE_BYTES = prometheus_client.Counter(
+    'aksh_http_response_bytes',
+    'Bytes of the responses read at once, by service host and endpoint.',
+    ('service', 'endpoint'),
+)
+DOWNLOADED_BYTES = prometheus_client.Counter(
+    'aksh_documents_downloaded_bytes',
+    'Bytes of the documents streamed to the staging directory.',
+)
+EXTRACTION_SECONDS = prometheus_client.Histogram(
+    'aksh_extraction_seconds',
+    'Seconds spent by an extraction backend, by MIME type.',
+    ('mime_type', 'backend'),
+    buckets=EXTRACTION_BUCKETS,
+)
+EXTRACTION_FAILURES = prometheus_client.Counter(
+    'aksh_extraction_failures',
+    'Extraction backends failed, by MIME type.',
+    ('mime_type', 'backend'),
+)
+EXTRACTION_CACHE_HITS = prometheus_client.Counter(
+    'aksh_extraction_cache_hits',
+    'Texts found in the text cache.',
+)
+PARSE_SECONDS = prometheus_client.Histogram(
+    'aksh_parse_seconds',
+    'Seconds to parse the acts of an issuer.',
+    ('issuer',),
+    buckets=EXTRACTION_BUCKETS,
+)
+PARSED_ACTS = prometheus_client.Counter(
+    'aksh_parsed_acts',
+    'Acts parsed from the sources, by validity.',
+    ('issuer', 'result'),
+)
+PIPELINE_ITEMS = prometheus_client.Counter(
+    'aksh_pipeline_items',
+    'Items handled by a pipeline stage, passed on or dropped.',
+    ('pipeline', 'stage', 'result'),
+)
+PIPELINE_SECONDS = prometheus_client.Histogram(
+    'aksh_pipeline_seconds',
+    'Seconds to handle an item in a pipeline stage.',
+    ('pipeline', 'stage'),
+    buckets=EXTRACTION_BUCKETS,
+)
+PIPELINE_QUEUE_DEPTH = prometheus_client.Gauge(
+    'aksh_pipeline_queue_depth',
+    'Items waiting for a pipeline stage.',
+    ('pipeline', 'stage'),
+)
+FORWARDED_ACTS = prometheus_client.Counter(
+    'aksh_forwarded_acts',
+    'Acts forwarded to interes.shtab.net, set aside or left pending.',
+    ('issuer', 'result'),
+)
+CIRCUIT_OPEN = prometheus_client.Gauge(
+    'aksh_circuit_open',
+    'Whether the circuit of a service is open.',
+    ('service',),
+)
+
+
+class PoolStatsCollector:
+    """Connections of the pools of the JSON services."""
+
+    def __init__(self, stats: T.Callable[[], T.Mapping[str, T.Any]]):
+        self.stats = stats
+
+    def collect(self) -> T.Iterator[CounterMetricFamily]:
+        family = CounterMetricFamily(
+            'aksh_http_pool_connections',
+            'Connections opened and reused by the pool of a service.',
+            labels=('service', 'kind'),
+        )
+        for url, stats in self.stats().items():
+            family.add_metric((url, 'opened'), stats.opened)
+            family.add_metric((url, 'reused'), stats.reused)
+        yield family
+
+
+def collect_pool_stats(stats: T.Callable[[], T.Mapping[str, T.Any]]):
+    prometheus_client.REGISTRY.register(PoolStatsCollector(stats))
+
+
+def http_endpoint(path: str) -> str:
+    """The `path` with its primary keys replaced, e.g. "/acts/acts/{pk}/"."""
+    return re.sub(r'(?<=/)\d+(?=/|$)', '{pk}', path)
+
+
+def http_trace_config(endpoint: str = None) -> aiohttp.TraceConfig:
+    """Time the requests and count the bytes read of the responses.
+
+    The requests are labeled with the `endpoint`, or with their path.
+    """
+
+    async def on_request_start(_, ctx, params) -> None:
+        ctx.started = time.perf_counter()
+        ctx.endpoint = endpoint or http_endpoint(params.url.path)
+
+    def observe(ctx, params, status: str) -> None:
+        HTTP_REQUEST_SECONDS.labels(
+            params.url.host,
+            ctx.endpoint,
+            params.method,
+            status,
+        ).observe(time.perf_counter() - ctx.started)
+
+    async def on_request_end(_, ctx, params) -> None:
+        observe(ctx, params, str(params.response.status))
+
+    async def on_request_exception(_, ctx, params) -> None:
+        observe(ctx, params, type(params.exception).__name__)
+
+    async def on_response_chunk_received(_, ctx, params) -> None:
+        HTTP_RESPONSE_BYTES.labels(
+            params.url.host,
+            ctx.endpoint,
+        ).inc(len(params.chunk))
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    trace_config.on_response_chunk_received.append(on_response_chunk_received)
+    return trace_config
+
+
+def track_queue(pipeline: str, stage: str, queue) -> None:
+    """Report the size of the `queue` until `untrack_queue`."""
+    PIPELINE_QUEUE_DEPTH.labels(pipeline, stage).set_function(queue.qsize)
+
+
+def untrack_queue(pipeline: str, stage: str) -> None:
+    PIPELINE_QUEUE_DEPTH.remove(pipeline, stage)
+
+
+async def endpoint() -> Response:
+    return Response(
+        prometheus_client.generate_latest(),
+        media_type=prometheus_client.CONTENT_TYPE_LATEST,
+    )
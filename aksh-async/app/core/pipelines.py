@@ -0,0 +1,112 @@
+"""Stages connected with bounded queues.
+
+Every item moves to the next stage as soon as it's handled, while the
+bounded queues stop a fast stage from running too far ahead of a slow one.
+"""
+import asyncio
+import dataclasses
+import time
+# noinspection PyPep8Naming
+import typing as T
+
+from app.core import metrics
+
+
+# Sent down the queues after the last item
+_DONE = object()
+
+
+@dataclasses.dataclass
+class Stage:
+    name: str
+    # Returns the item for the next stage, or None to drop it
+    handler: T.Callable[[T.Any], T.Awaitable[T.Optional[T.Any]]]
+    workers: int = 1
+    # Called once the stage has handled all of its items
+    on_drained: T.Callable[[], T.Awaitable[None]] = None
+    # Called with the amount of handled items after every one of them
+    on_progress: T.Callable[[int], None] = None
+
+    passed: int = 0
+    dropped: int = 0
+
+
+async def _run_stage(
+        pipeline: str,
+        stage: Stage,
+        inbox: asyncio.Queue,
+        outbox: T.Optional[asyncio.Queue],
+) -> None:
+    seconds = metrics.PIPELINE_SECONDS.labels(pipeline, stage.name)
+    passed = metrics.PIPELINE_ITEMS.labels(pipeline, stage.name, 'passed')
+    dropped = metrics.PIPELINE_ITEMS.labels(pipeline, stage.name, 'dropped')
+
+    async def worker() -> None:
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                # Let the other workers of the stage see it too
+                await inbox.put(_DONE)
+                return
+
+            started = time.perf_counter()
+            result = await stage.handler(item)
+            seconds.observe(time.perf_counter() - started)
+            if result is None:
+                stage.dropped += 1
+                dropped.inc()
+            else:
+                stage.passed += 1
+                passed.inc()
+            if stage.on_progress is not None:
+                stage.on_progress(stage.passed + stage.dropped)
+            if result is None:
+                continue
+
+            if outbox is not None:
+                await outbox.put(result)
+
+    await asyncio.gather(*(worker() for _ in range(stage.workers)))
+    # Before the next stages can drain, so they are drained in order
+    if stage.on_drained is not None:
+        await stage.on_drained()
+    if outbox is not None:
+        await outbox.put(_DONE)
+
+
+async def _feed(source: T.AsyncIterable, queue: asyncio.Queue) -> None:
+    async for item in source:
+        await queue.put(item)
+    await queue.put(_DONE)
+
+
+async def run_pipeline(
+        source: T.AsyncIterable,
+        *stages: Stage,
+        queue_size: int,
+        name: str = '',
+) -> None:
+    """Pass the items of the `source` through the `stages`.
+
+    The metrics of the stages are labeled with the `name` of the pipeline.
+    """
+    queues = [asyncio.Queue(queue_size) for _ in stages]
+    outboxes = [*queues[1:], None]
+    for stage, inbox in zip(stages, queues):
+        metrics.track_queue(name, stage.name, inbox)
+    tasks = [asyncio.ensure_future(_feed(source, queues[0]))]
+    tasks.extend(
+        asyncio.ensure_future(_run_stage(name, stage, inbox, outbox))
+        for stage, inbox, outbox in zip(stages, queues, outboxes)
+    )
+
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Don't leave the other stages waiting forever
+        for task in tasks:
+            task.cancel()
+        raise
+    finally:
+        for stage in stages:
+            metrics.untrack_queue(name, stage.name)
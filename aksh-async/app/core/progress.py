@@ -0,0 +1,180 @@
+"""Progress of the runs, published to any number of subscribers.
+
+Publishing never waits for the subscribers: every one of them has a bounded
+queue, where a progress event replaces the pending one of its stage and the
+oldest events are dropped when it's full. So a slow websocket client can't
+slow down the runs, nor grow their memory.
+"""
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import itertools
+import time
+# noinspection PyPep8Naming
+import typing as T
+
+from app.core.settings import PROGRESS_INTERVAL, PROGRESS_QUEUE_SIZE
+from app.core.utils import slotted
+
+
+@slotted
+@dataclasses.dataclass
+class ProgressEvent:
+    # "message", "progress" or "idle" once no run is left
+    type: str
+    issuer: str = None
+    stage: str = None
+    run: int = None
+    message: str = None
+    done: int = None
+    total: int = None
+    # Items a second and seconds left
+    rate: float = None
+    eta: float = None
+
+    def to_dict(self) -> dict:
+        return {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if getattr(self, name) is not None
+        }
+
+
+class Subscription:
+    """The events not sent to a subscriber yet."""
+
+    def __init__(self, maxsize: int = PROGRESS_QUEUE_SIZE):
+        self.maxsize = maxsize
+        # Events the subscriber was too slow for
+        self.dropped = 0
+        self._events: T.OrderedDict[T.Hashable, ProgressEvent] = \
+            collections.OrderedDict()
+        self._keys = itertools.count()
+        self._ready = asyncio.Event()
+
+    def put_nowait(self, event: ProgressEvent) -> None:
+        if event.type == 'progress':
+            key = (event.issuer, event.stage)
+        else:
+            key = next(self._keys)
+
+        if key not in self._events and len(self._events) >= self.maxsize:
+            # The progress is the latest one of its stage already, so the
+            # oldest message goes first
+            oldest = next(
+                (k for k in self._events if not isinstance(k, tuple)),
+                next(iter(self._events)),
+            )
+            del self._events[oldest]
+            self.dropped += 1
+        # The newer progress takes the place of the pending one
+        self._events[key] = event
+        self._ready.set()
+
+    async def get(self) -> ProgressEvent:
+        while not self._events:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._events.popitem(last=False)[1]
+
+
+class ProgressTracker:
+    """Publishes the progress of a stage at most every `interval` seconds."""
+
+    def __init__(
+            self,
+            hub: 'ProgressHub',
+            issuer: str,
+            stage: str,
+            total: int = None,
+            interval: float = PROGRESS_INTERVAL,
+    ):
+        self.hub = hub
+        self.issuer = issuer
+        self.stage = stage
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self._started = time.monotonic()
+        self._published = -interval
+        self._published_done: T.Optional[int] = None
+
+    def event(self) -> ProgressEvent:
+        elapsed = time.monotonic() - self._started
+        rate = self.done / elapsed if elapsed else None
+        eta = None
+        if self.total is not None and rate:
+            eta = round(max(self.total - self.done, 0) / rate, 1)
+        return ProgressEvent(
+            type='progress',
+            issuer=self.issuer,
+            stage=self.stage,
+            done=self.done,
+            total=self.total,
+            rate=None if rate is None else round(rate, 2),
+            eta=eta,
+        )
+
+    def _publish(self) -> None:
+        self._published = time.monotonic()
+        self._published_done = self.done
+        self.hub.publish(self.event())
+
+    def update(self, done: int) -> None:
+        self.done = done
+        now = time.monotonic()
+        if now - self._published >= self.interval or done == self.total:
+            self._publish()
+
+    def flush(self) -> None:
+        """Publish the latest progress, unless it's published already."""
+        if self.done != self._published_done:
+            self._publish()
+
+
+class ProgressHub:
+    """Sends every event to all the current subscribers."""
+
+    def __init__(self, queue_size: int = PROGRESS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions: T.Set[Subscription] = set()
+
+    def publish(self, event: ProgressEvent) -> None:
+        for subscription in self._subscriptions:
+            subscription.put_nowait(event)
+
+    def informer(
+            self,
+            issuer: str,
+            stage: str,
+            run: int = None,
+    ) -> T.Callable[[str], T.Awaitable[None]]:
+        """A callable publishing the messages of the `stage`."""
+        async def inform(message: str) -> None:
+            self.publish(ProgressEvent(
+                type='message',
+                issuer=issuer,
+                stage=stage,
+                run=run,
+                message=message,
+            ))
+
+        return inform
+
+    def tracker(
+            self,
+            issuer: str,
+            stage: str,
+            total: int = None,
+    ) -> ProgressTracker:
+        return ProgressTracker(self, issuer, stage, total)
+
+    @contextlib.contextmanager
+    def subscribe(self) -> T.Iterator[Subscription]:
+        subscription = Subscription(self.queue_size)
+        self._subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._subscriptions.discard(subscription)
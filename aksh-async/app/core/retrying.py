@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import random
+import time
+# noinspection PyPep8Naming
+import typing as T
+
+from app.core import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+Result = T.TypeVar('Result')
+
+
+async def retry(
+        func: T.Callable[[], T.Awaitable[Result]],
+        *,
+        exceptions: T.Tuple[T.Type[BaseException], ...],
+        attempts: int,
+        backoff: float,
+        max_backoff: float = 60,
+        jitter: bool = False,
+) -> Result:
+    """Await `func()` until it succeeds, sleeping exponentially longer.
+
+    With `jitter` every sleep is a random part of its exponential delay,
+    so the callers failing together don't retry together.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return await func()
+        except exceptions as e:
+            if attempt == attempts:
+                raise
+
+            delay = min(max_backoff, backoff * 2 ** (attempt - 1))
+            if jitter:
+                delay = random.uniform(0, delay)
+            logger.warning(
+                f'Attempt {attempt} failed: {e!r}, retry in {delay:.1f}',
+            )
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """Pauses the calls to a service which keeps failing.
+
+    After `threshold` failures in a row the circuit opens and the calls
+    wait for `cooldown` seconds. Then a single call is let through, which
+    closes the circuit if it succeeds, or opens it again.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            *,
+            exceptions: T.Tuple[T.Type[BaseException], ...],
+            threshold: int,
+            cooldown: float,
+    ):
+        self.name = name
+        self.exceptions = exceptions
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened: T.Optional[float] = None
+        # Lets a single call through once the cooldown is over
+        self._trial: T.Optional[asyncio.Lock] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened is not None
+
+    async def _call(self, func: T.Callable[[], T.Awaitable[Result]]) -> Result:
+        try:
+            result = await func()
+        except self.exceptions:
+            self._failures += 1
+            if self.is_open or self._failures >= self.threshold:
+                if not self.is_open:
+                    logger.warning(f'{self.name} circuit opened')
+                    metrics.CIRCUIT_OPEN.labels(self.name).set(1)
+                self._opened = time.monotonic()
+            raise
+
+        self._failures = 0
+        if self.is_open:
+            logger.info(f'{self.name} circuit closed')
+            metrics.CIRCUIT_OPEN.labels(self.name).set(0)
+            self._opened = None
+        return result
+
+    async def call(self, func: T.Callable[[], T.Awaitable[Result]]) -> Result:
+        """Await `func()` once the circuit lets it through."""
+        while self.is_open:
+            remaining = self._opened + self.cooldown - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+                continue
+
+            # The lock is created lazily to bind it to the running loop
+            if self._trial is None:
+                self._trial = asyncio.Lock()
+            async with self._trial:
+                # Another call may have tried the service while this waited
+                if not self.is_open:
+                    break
+                if self._opened + self.cooldown <= time.monotonic():
+                    return await self._call(func)
+
+        return await self._call(func)
@@ -1,3 +1,4 @@
+import base64
 import dataclasses
 import functools
 import logging
@@ -5,6 +6,15 @@ import logging
 import typing as T
 
 import aiohttp
+import yarl
+
+from app.core import json, metrics
+from app.core.settings import (
+    API_PAGE_SIZE,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -21,10 +31,62 @@ class ServiceResponse:
     type: T.Literal['text', 'json']
 
 
+@dataclasses.dataclass
+class PoolStats:
+    opened: int = 0
+    reused: int = 0
+
+
 class ServiceException(Exception):
     pass
 
 
+class Base64JSONPayload(aiohttp.Payload):
+    """JSON of `data` and a `field` with the base64 of the joined `parts`.
+
+    The `parts` are joined by `separator` and encoded in chunks while the
+    body is sent, so neither the joined parts nor their base64 are ever
+    held in memory.
+    """
+    CHUNK_SIZE = 3 * 2 ** 16
+
+    def __init__(
+            self,
+            data: T.Mapping[str, T.Any],
+            field: str,
+            parts: T.Sequence[bytes],
+            separator: bytes = b'',
+    ):
+        super().__init__(parts, content_type='application/json')
+        self._head = json.dumps({**data, field: ''})[:-2]
+        self._separator = separator
+
+        size = sum(map(len, parts)) + len(separator) * max(len(parts) - 1, 0)
+        # 4 base64 characters for every 3 bytes, the last ones padded
+        self._size = len(self._head) + -(-size // 3) * 4 + 2
+
+    def _chunks(self) -> T.Iterator[bytes]:
+        """The joined parts, split in chunks of a multiple of 3 bytes."""
+        buffer = bytearray()
+        for i, part in enumerate(self._value):
+            if i:
+                buffer += self._separator
+            part = memoryview(part)
+            for start in range(0, len(part), self.CHUNK_SIZE):
+                buffer += part[start:start + self.CHUNK_SIZE]
+                if len(buffer) >= self.CHUNK_SIZE:
+                    cut = len(buffer) - len(buffer) % 3
+                    yield bytes(buffer[:cut])
+                    del buffer[:cut]
+        yield bytes(buffer)
+
+    async def write(self, writer) -> None:
+        await writer.write(self._head)
+        for chunk in self._chunks():
+            await writer.write(base64.b64encode(chunk))
+        await writer.write(b'"}')
+
+
 class Service:
     """Common parent for all services."""
     ServiceException = ServiceException
@@ -33,6 +95,68 @@ class Service:
 class JSONAPI(Service):
     URL: str
 
+    POOL_LIMIT: int = HTTP_POOL_LIMIT
+    POOL_LIMIT_PER_HOST: int = HTTP_POOL_LIMIT_PER_HOST
+    KEEPALIVE_TIMEOUT: float = HTTP_KEEPALIVE_TIMEOUT
+
+    # Pools are kept per service URL, so the subclasses of a service
+    # (e.g. `app.acts.services.API`) share the pool of their parent
+    _sessions: T.ClassVar[T.Dict[str, aiohttp.ClientSession]] = {}
+    _stats: T.ClassVar[T.Dict[str, PoolStats]] = {}
+
+    @classmethod
+    def pool_stats(cls) -> PoolStats:
+        return cls._stats.setdefault(cls.URL, PoolStats())
+
+    @classmethod
+    def _create_trace_config(cls) -> aiohttp.TraceConfig:
+        stats = cls.pool_stats()
+
+        async def on_connection_create_end(*_) -> None:
+            stats.opened += 1
+
+        async def on_connection_reuseconn(*_) -> None:
+            stats.reused += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    @classmethod
+    async def open_pool(cls) -> aiohttp.ClientSession:
+        session = cls._sessions.get(cls.URL)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=cls.POOL_LIMIT,
+                limit_per_host=cls.POOL_LIMIT_PER_HOST,
+                keepalive_timeout=cls.KEEPALIVE_TIMEOUT,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                raise_for_status=False,
+                trace_configs=[
+                    cls._create_trace_config(),
+                    metrics.http_trace_config(),
+                ],
+            )
+            cls._sessions[cls.URL] = session
+
+        return session
+
+    @classmethod
+    async def close_pool(cls) -> None:
+        session = cls._sessions.pop(cls.URL, None)
+        if session is not None:
+            await session.close()
+
+    @staticmethod
+    def _is_json(response: aiohttp.ClientResponse) -> bool:
+        return (
+            response.content_type == 'application/json'
+            or response.content_type.endswith('+json')
+        )
+
     @classmethod
     async def _request(
             cls,
@@ -52,8 +176,14 @@ class JSONAPI(Service):
         if params is not None:
             params = dict((k, v) for k, v in params.items() if v is not None)
 
-        if files is None:
-            data = aiohttp.JsonPayload(data)
+        if isinstance(data, aiohttp.Payload):
+            # Sent as it is, e.g. a streamed body
+            pass
+        elif files is None:
+            data = aiohttp.BytesPayload(
+                json.dumps(data),
+                content_type='application/json',
+            )
         else:
             form = aiohttp.FormData()
             if data is not None and len(data) != 0:
@@ -63,40 +193,54 @@ class JSONAPI(Service):
                 form.add_field(field, file_bytes, filename=file_name)
             data = form
 
-        async with aiohttp.ClientSession(raise_for_status=False) as session:
-            request = getattr(session, method)
-            response: aiohttp.ClientResponse
-            async with request(
-                    url,
-                    params=params,
-                    data=data,
-                    headers=headers,
-                    timeout=timeout,
-            ) as response:
-                if not response.ok:
-                    # noinspection PyProtectedMember
-                    response.content._exception = None
-                    if response.status < 500:
+        session = await cls.open_pool()
+        request = getattr(session, method)
+        response: aiohttp.ClientResponse
+        async with request(
+                url,
+                params=params,
+                data=data,
+                headers=headers,
+                timeout=timeout,
+        ) as response:
+            if not response.ok:
+                # noinspection PyProtectedMember
+                response.content._exception = None
+                body = await response.read()
+                # Not the service itself, e.g. the 413 page of a proxy
+                if response.status < 500 and cls._is_json(response):
+                    try:
                         return ServiceResponse(
                             ok=False,
                             status=response.status,
-                            data=await response.json(),
+                            data=json.loads(body),
                             type='json',
                         )
-                    else:
-                        return ServiceResponse(
-                            ok=False,
-                            status=response.status,
-                            data=await response.text(),
-                            type='text',
-                        )
+                    except ValueError:
+                        pass
 
                 return ServiceResponse(
-                    ok=True,
+                    ok=False,
+                    status=response.status,
+                    data=await response.text(errors='replace'),
+                    type='text',
+                )
+
+            if not cls._is_json(response):
+                # What `ClientResponse.json` raises
+                raise aiohttp.ContentTypeError(
+                    response.request_info,
+                    response.history,
                     status=response.status,
-                    data=await response.json(),
-                    type='json',
+                    message=f'Unexpected {response.content_type} response',
+                    headers=response.headers,
                 )
+            return ServiceResponse(
+                ok=True,
+                status=response.status,
+                data=json.loads(await response.read()),
+                type='json',
+            )
 
     get: ReqType = functools.partialmethod(_request, 'get')
     post: ReqType = functools.partialmethod(_request, 'post')
@@ -105,10 +249,37 @@ class JSONAPI(Service):
     delete: ReqType = functools.partialmethod(_request, 'delete')
 
 
+metrics.collect_pool_stats(lambda: JSONAPI._stats)
+
+
 class API(JSONAPI):
     # noinspection HttpUrlsUsage
     URL = 'http://api:8000'
 
+    PAGE_SIZE: int = API_PAGE_SIZE
+
+    @classmethod
+    async def iter_pages(
+            cls,
+            path: str,
+            /,
+            **params,
+    ) -> T.AsyncIterator[T.List[T.Any]]:
+        """Follow the cursor pagination of the list `path`."""
+        params = {'page_size': cls.PAGE_SIZE, **params}
+        while True:
+            response = await cls.get(path, params=params, timeout=20)
+            if not response.ok:
+                error_text = f'Error retrieving {path} from {cls.URL}'
+                raise ServiceException(error_text)
+
+            yield response.data['results']
+
+            next_url = response.data['next']
+            if next_url is None:
+                return
+            params['cursor'] = yarl.URL(next_url).query['cursor']
+
 
 class Interest(JSONAPI):
     # noinspection SpellCheckingInspection
@@ -1,7 +1,95 @@
 import os
+import pathlib
 
 
 INTERESTS_API_KEYS = {
     'Sumy': os.environ['SUMY_API_KEY'],
     'Dnipro': os.environ['DNIPRO_API_KEY'],
 }
+
+# Connection pools of the JSON services
+HTTP_POOL_LIMIT = int(os.environ.get('HTTP_POOL_LIMIT', 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get('HTTP_POOL_LIMIT_PER_HOST', 20))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get('HTTP_KEEPALIVE_TIMEOUT', 30))
+
+# Amount of items requested from the API in one page
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 1000))
+
+# Documents downloading
+DOWNLOAD_WORKERS = int(os.environ.get('DOWNLOAD_WORKERS', 4))
+DOWNLOAD_RETRIES = int(os.environ.get('DOWNLOAD_RETRIES', 3))
+DOWNLOAD_BACKOFF = float(os.environ.get('DOWNLOAD_BACKOFF', 2))
+# Whether to check the already downloaded documents for changes
+REFRESH_DOCUMENTS = os.environ.get('REFRESH_DOCUMENTS', '') == '1'
+
+# Requests per second allowed for the sources hosts without a politeness
+# delay declared by their parsers
+SOURCES_DEFAULT_RATE = float(os.environ.get('SOURCES_DEFAULT_RATE', 1))
+# Overrides of the politeness delays, e.g. "smr.gov.ua=2,dniprorada.gov.ua=1"
+SOURCES_RATE_LIMITS = {
+    host: float(rate)
+    for host, rate in (
+        limit.split('=')
+        for limit in os.environ.get('SOURCES_RATE_LIMITS', '').split(',')
+        if limit
+    )
+}
+
+# The volume shared with the `api` service (its `MEDIA_ROOT`)
+MEDIA_DIR = pathlib.Path(os.environ.get('MEDIA_DIR', '/api-data'))
+# Should match `MEDIA_STAGING_DIR` of the `api` service
+STAGING_DIR = MEDIA_DIR / 'staging'
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get('DOWNLOAD_CHUNK_SIZE', 64 * 1024))
+
+# Cache of the sources responses for the development: "record" keeps the
+# responses and reuses them for `HTTP_CACHE_TTL` seconds, "replay" only
+# reuses them, whatever their age, and never requests the sources
+HTTP_CACHE = os.environ.get('HTTP_CACHE', '')
+HTTP_CACHE_DIR = pathlib.Path(
+    os.environ.get('HTTP_CACHE_DIR', MEDIA_DIR / 'http-cache'),
+)
+HTTP_CACHE_TTL = int(os.environ.get('HTTP_CACHE_TTL', 24 * 60 * 60))
+# Bytes, the least recently used responses are evicted above it
+HTTP_CACHE_MAX_SIZE = int(os.environ.get('HTTP_CACHE_MAX_SIZE', 1024 ** 3))
+
+# Text extraction
+EXTRACTION_WORKERS = int(
+    os.environ.get('EXTRACTION_WORKERS', os.cpu_count() or 1),
+)
+# Seconds to extract the text of one file
+EXTRACTION_TIMEOUT = int(os.environ.get('EXTRACTION_TIMEOUT', 600))
+# Extracted texts, keyed by the SHA-256 of the files content
+TEXT_CACHE_DIR = pathlib.Path(
+    os.environ.get('TEXT_CACHE_DIR', MEDIA_DIR / 'text-cache'),
+)
+
+# OCR of the scanned PDF pages
+OCR_DPI = int(os.environ.get('OCR_DPI', 300))
+# Pages of one document to OCR, the rest keeps its (empty) text layer
+OCR_MAX_PAGES = int(os.environ.get('OCR_MAX_PAGES', 100))
+OCR_PAGE_TIMEOUT = int(os.environ.get('OCR_PAGE_TIMEOUT', 120))
+
+# Jobs
+# Parsed acts of the runs, kept until they are stored
+RUNS_DIR = pathlib.Path(os.environ.get('RUNS_DIR', MEDIA_DIR / 'runs'))
+# Items waiting between two stages of the pipeline
+PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', 100))
+# Acts of one issuer (one API key) forwarded at the same time
+FORWARD_WORKERS = int(os.environ.get('FORWARD_WORKERS', 2))
+FORWARD_RETRIES = int(os.environ.get('FORWARD_RETRIES', 5))
+FORWARD_BACKOFF = float(os.environ.get('FORWARD_BACKOFF', 2))
+# Failures of interes.shtab.net in a row pausing the forwarding, and the
+# seconds of the pause
+FORWARD_BREAKER_THRESHOLD = int(os.environ.get('FORWARD_BREAKER_THRESHOLD', 5))
+FORWARD_BREAKER_COOLDOWN = float(
+    os.environ.get('FORWARD_BREAKER_COOLDOWN', 60),
+)
+# Seconds between two progress events of a stage
+PROGRESS_INTERVAL = float(os.environ.get('PROGRESS_INTERVAL', 0.5))
+# Events waiting for a slow subscriber, the oldest ones are dropped above it
+PROGRESS_QUEUE_SIZE = int(os.environ.get('PROGRESS_QUEUE_SIZE', 100))
+# Whether to start the runs according to the schedules of the parsers
+RUN_SCHEDULER = os.environ.get('RUN_SCHEDULER', '') == '1'
+# Days parsed again before the watermark of the previous run, to catch the
+# acts published late on its day
+WATERMARK_OVERLAP = int(os.environ.get('WATERMARK_OVERLAP', 1))
@@ -0,0 +1,237 @@
+import asyncio
+import base64
+import json
+import time
+import unittest
+from unittest import mock
+
+from .progress import ProgressEvent, Subscription
+from .retrying import CircuitBreaker, retry
+from .services import Base64JSONPayload
+
+
+class Writer:
+    def __init__(self):
+        self.body = bytearray()
+
+    async def write(self, chunk: bytes) -> None:
+        self.body += chunk
+
+
+class Base64JSONPayloadTestCase(unittest.IsolatedAsyncioTestCase):
+    async def check(self, parts, separator=b''):
+        data = {'title': 'Рішення', 'link': 'https://smr.gov.ua/1.pdf'}
+        payload = Base64JSONPayload(data, 'file_content', parts, separator)
+        writer = Writer()
+        await payload.write(writer)
+
+        self.assertEqual(payload.size, len(writer.body))
+        self.assertEqual(json.loads(writer.body), {
+            **data,
+            'file_content': base64.b64encode(separator.join(parts)).decode(),
+        })
+
+    async def test_content(self):
+        await self.check([])
+        await self.check([b''])
+        await self.check([b'a'])
+        await self.check([b'ab', b'', b'cde'], separator=b'.\n\n\n')
+
+    async def test_chunks(self):
+        # The parts and the separators cross the borders of the chunks
+        with mock.patch.object(Base64JSONPayload, 'CHUNK_SIZE', 6):
+            for size in range(1, 20):
+                parts = [bytes(range(size)), b'x' * (size * 7 % 11)] * 2
+                await self.check(parts, separator=b'--')
+
+
+class Failing:
+    """Fails `failures` times, then returns the number of the call."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError
+        return self.calls
+
+
+class RetryTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_success(self):
+        func = Failing(2)
+
+        result = await retry(
+            func,
+            exceptions=(ConnectionError,),
+            attempts=3,
+            backoff=0,
+        )
+
+        self.assertEqual(result, 3)
+
+    async def test_attempts(self):
+        func = Failing(3)
+
+        with self.assertRaises(ConnectionError):
+            await retry(
+                func,
+                exceptions=(ConnectionError,),
+                attempts=3,
+                backoff=0,
+            )
+        self.assertEqual(func.calls, 3)
+
+    async def test_other_exceptions(self):
+        func = Failing(1)
+
+        with self.assertRaises(ConnectionError):
+            await retry(func, exceptions=(KeyError,), attempts=3, backoff=0)
+        self.assertEqual(func.calls, 1)
+
+
+class CircuitBreakerTestCase(unittest.IsolatedAsyncioTestCase):
+    COOLDOWN = 0.05
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(
+            'test',
+            exceptions=(ConnectionError,),
+            threshold=3,
+            cooldown=self.COOLDOWN,
+        )
+
+    async def open(self):
+        for _ in range(self.breaker.threshold):
+            with self.assertRaises(ConnectionError):
+                await self.breaker.call(Failing(1))
+
+    async def test_open(self):
+        for _ in range(self.breaker.threshold - 1):
+            with self.assertRaises(ConnectionError):
+                await self.breaker.call(Failing(1))
+        self.assertFalse(self.breaker.is_open)
+
+        # A success resets the count of the failures
+        await self.breaker.call(Failing(0))
+        with self.assertRaises(ConnectionError):
+            await self.breaker.call(Failing(1))
+        self.assertFalse(self.breaker.is_open)
+
+        await self.open()
+        self.assertTrue(self.breaker.is_open)
+
+    async def test_single_trial(self):
+        await self.open()
+        calls = []
+        trial = asyncio.Event()
+
+        async def func():
+            calls.append(time.monotonic())
+            await trial.wait()
+
+        started = time.monotonic()
+        tasks = [
+            asyncio.ensure_future(self.breaker.call(func))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(self.COOLDOWN * 2)
+
+        # Nothing is let through before the cooldown, then a single call
+        self.assertEqual(len(calls), 1)
+        self.assertGreaterEqual(calls[0] - started, self.COOLDOWN * 0.9)
+
+        # Its success closes the circuit for the others
+        trial.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(len(calls), 3)
+        self.assertFalse(self.breaker.is_open)
+
+    async def test_failed_trial(self):
+        await self.open()
+        await asyncio.sleep(self.COOLDOWN)
+
+        with self.assertRaises(ConnectionError):
+            await self.breaker.call(Failing(1))
+        self.assertTrue(self.breaker.is_open)
+
+        # Opened again for a whole cooldown
+        started = time.monotonic()
+        await self.breaker.call(Failing(0))
+        self.assertGreaterEqual(
+            time.monotonic() - started,
+            self.COOLDOWN * 0.9,
+        )
+        self.assertFalse(self.breaker.is_open)
+
+
+class SubscriptionTestCase(unittest.IsolatedAsyncioTestCase):
+    @staticmethod
+    def progress(stage, done):
+        return ProgressEvent('progress', 'Sumy', stage, done=done)
+
+    @staticmethod
+    def message(message):
+        return ProgressEvent('message', 'Sumy', 'run', message=message)
+
+    async def events(self, subscription):
+        events = []
+        while subscription._events:
+            events.append(await subscription.get())
+        return events
+
+    async def test_coalescing(self):
+        subscription = Subscription(maxsize=10)
+        for event in (
+                self.progress('download', 1),
+                self.message('1'),
+                self.progress('download', 2),
+                self.progress('forward', 1),
+                self.message('2'),
+        ):
+            subscription.put_nowait(event)
+
+        # The latest progress of a stage, in the place of the first one
+        self.assertEqual(await self.events(subscription), [
+            self.progress('download', 2),
+            self.message('1'),
+            self.progress('forward', 1),
+            self.message('2'),
+        ])
+        self.assertEqual(subscription.dropped, 0)
+
+    async def test_full(self):
+        subscription = Subscription(maxsize=2)
+        for event in (
+                self.message('1'),
+                self.progress('download', 1),
+                self.message('2'),
+        ):
+            subscription.put_nowait(event)
+
+        # The oldest message is dropped before any progress
+        self.assertEqual(await self.events(subscription), [
+            self.progress('download', 1),
+            self.message('2'),
+        ])
+
+        subscription.put_nowait(self.progress('download', 2))
+        subscription.put_nowait(self.progress('forward', 1))
+        subscription.put_nowait(self.progress('refresh', 1))
+        # With no message left, the oldest progress is dropped
+        self.assertEqual(await self.events(subscription), [
+            self.progress('forward', 1),
+            self.progress('refresh', 1),
+        ])
+        self.assertEqual(subscription.dropped, 2)
+
+    async def test_get(self):
+        subscription = Subscription()
+        get = asyncio.ensure_future(subscription.get())
+        await asyncio.sleep(0)
+        self.assertFalse(get.done())
+
+        subscription.put_nowait(self.message('1'))
+        self.assertEqual(await get, self.message('1'))
@@ -0,0 +1,74 @@
+import asyncio
+import time
+# noinspection PyPep8Naming
+import typing as T
+
+import aiohttp
+
+from app.core.settings import SOURCES_DEFAULT_RATE, SOURCES_RATE_LIMITS
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock: T.Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        # The lock is created lazily to bind it to the running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+_buckets: T.Dict[str, TokenBucket] = {}
+# Requests per second the parsers ask for their sources
+_polite_rates: T.Dict[str, float] = {}
+
+
+def set_politeness_delay(host: str, delay: float) -> None:
+    """Keep at least `delay` seconds between the requests to the `host`."""
+    if delay <= 0:
+        raise ValueError(f'The politeness delay of {host} must be positive')
+    _polite_rates[host] = 1 / delay
+    _buckets.pop(host, None)
+
+
+def host_bucket(host: str) -> TokenBucket:
+    """Return the bucket shared by every request to the `host`."""
+    bucket = _buckets.get(host)
+    if bucket is None:
+        rate = SOURCES_RATE_LIMITS.get(
+            host,
+            _polite_rates.get(host, SOURCES_DEFAULT_RATE),
+        )
+        bucket = _buckets[host] = TokenBucket(rate)
+
+    return bucket
+
+
+def throttling_trace_config() -> aiohttp.TraceConfig:
+    """Wait for the bucket of the host before every request of a session."""
+
+    async def on_request_start(_, __, params) -> None:
+        await host_bucket(params.url.host).acquire()
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    return trace_config
@@ -0,0 +1,24 @@
+"""Spans of the acts, with OpenTelemetry when it's installed.
+
+Without the `opentelemetry-api` package, or without an SDK configured for
+it, the spans do nothing.
+"""
+import contextlib
+# noinspection PyPep8Naming
+import typing as T
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover
+    trace = None
+
+
+if trace is not None:
+    tracer = trace.get_tracer('aksh')
+
+    def span(name: str, **attributes: T.Any) -> T.ContextManager:
+        return tracer.start_as_current_span(name, attributes=attributes)
+
+else:
+    def span(name: str, **attributes: T.Any) -> T.ContextManager:
+        return contextlib.nullcontext()
@@ -0,0 +1,22 @@
+import dataclasses
+# noinspection PyPep8Naming
+import typing as T
+
+
+Class = T.TypeVar('Class', bound=type)
+
+
+def slotted(cls: Class) -> Class:
+    """Recreate the dataclass `cls` with `__slots__` of its fields.
+
+    The `slots=True` of the dataclasses of Python 3.10.
+    """
+    namespace = dict(cls.__dict__)
+    fields = tuple(field.name for field in dataclasses.fields(cls))
+    for name in fields:
+        # The defaults are kept by `__init__`
+        namespace.pop(name, None)
+    namespace.pop('__dict__', None)
+    namespace.pop('__weakref__', None)
+    namespace['__slots__'] = fields
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
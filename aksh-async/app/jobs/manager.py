@@ -0,0 +1,160 @@
+"""Runs of the acts pipeline, one at a time per issuer.
+
+The runs are stored by the `api` service with a checkpoint after every
+stage, so the runs interrupted by a restart continue where they stopped.
+"""
+import asyncio
+import datetime
+import logging
+# noinspection PyPep8Naming
+import typing as T
+
+from app.acts.acts_processors import ActsProcessor
+from app.acts.parsers import PARSERS, ParserSpec
+from app.acts.structures import Act
+from app.core import json
+from app.core.progress import ProgressEvent, ProgressHub
+from app.core.settings import REFRESH_DOCUMENTS, RUNS_DIR, WATERMARK_OVERLAP
+from .services import API
+from .structures import Run
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobManager:
+    def __init__(self, parsers: T.Mapping[str, ParserSpec]):
+        self.parsers = parsers
+        self.progress = ProgressHub()
+        self.processor = ActsProcessor(self.progress)
+        self._tasks: T.Dict[str, asyncio.Task] = {}
+        # Held while a run of the issuer is being started, created lazily
+        # to bind them to the running loop
+        self._starting: T.Dict[str, asyncio.Lock] = {}
+
+    @property
+    def running(self) -> T.Set[str]:
+        """The issuers with a run in progress."""
+        return set(self._tasks)
+
+    async def _inform(self, run: Run, message: str) -> None:
+        await self.progress.informer(run.issuer, 'run', run.id)(message)
+
+    @staticmethod
+    def _parsed_acts_path(run: Run):
+        return RUNS_DIR / f'{run.id}.json'
+
+    async def _parse(self, run: Run) -> datetime.date:
+        """Parse the acts and return the watermark of the run."""
+        watermark = datetime.date.today()
+        parser = self.parsers[run.issuer].parse
+        acts = await self.processor.parse(run.issuer, parser, run.since)
+
+        # Keep the parsed acts until they are stored
+        RUNS_DIR.mkdir(exist_ok=True, parents=True)
+        path = self._parsed_acts_path(run)
+        temporary_path = path.with_suffix('.tmp')
+        temporary_path.write_bytes(
+            json.dumps([act.to_dict() for act in acts.values()]),
+        )
+        temporary_path.replace(path)
+
+        return watermark
+
+    async def _store(self, run: Run) -> None:
+        path = self._parsed_acts_path(run)
+        acts = [Act.from_dict(data) for data in json.loads(path.read_bytes())]
+        partial = run.mode == 'incremental'
+        await self.processor.store(run.issuer, acts, partial)
+        path.unlink()
+
+    async def _checkpoint(self, run: Run, stage: str, **data) -> None:
+        await API.change_run(run.id, checkpoint=stage, **data)
+        await self._inform(run, f'Stage {stage} is done')
+
+    async def _execute(self, run: Run) -> None:
+        remaining_stages = run.remaining_stages
+        try:
+            if 'parse' in remaining_stages:
+                watermark = await self._parse(run)
+                await self._checkpoint(run, 'parse', watermark=str(watermark))
+            if 'store' in remaining_stages:
+                await self._store(run)
+                await self._checkpoint(run, 'store')
+            # The pending acts are picked up from the database, so the
+            # streamed stages simply go on with what is left of them
+            await self.processor.process(
+                run.issuer,
+                lambda stage: self._checkpoint(run, stage),
+                self.parsers[run.issuer].concurrency,
+            )
+            if REFRESH_DOCUMENTS:
+                await self.processor.refresh(run.issuer)
+        except asyncio.CancelledError:
+            # Left running, so it's resumed on the next start
+            raise
+        except Exception as e:
+            logger.exception(f'Run {run.id} of {run.issuer} failed')
+            await API.change_run(run.id, status='failed', error=repr(e))
+            await self._inform(run, f'Run failed: {e!r}')
+        else:
+            await API.change_run(run.id, status='finished')
+            await self._inform(run, 'Run finished')
+        finally:
+            del self._tasks[run.issuer]
+            if not self._tasks:
+                self.progress.publish(ProgressEvent(type='idle'))
+
+    def _spawn(self, run: Run) -> None:
+        self._tasks[run.issuer] = asyncio.ensure_future(self._execute(run))
+
+    @staticmethod
+    async def _since(issuer: str) -> T.Optional[datetime.date]:
+        """The date to parse the acts of the `issuer` from."""
+        latest = await API.fetch_latest_runs(issuer=issuer, status='finished')
+        run = latest.get(issuer)
+        if run is None or run.watermark is None:
+            return None
+        return run.watermark - datetime.timedelta(days=WATERMARK_OVERLAP)
+
+    async def start(self, issuer: str, full: bool = False) -> None:
+        """Start a run for the `issuer` unless it's already running.
+
+        The run parses only the acts published since the previous one,
+        unless it's a `full` scan or there was no previous one.
+        """
+        lock = self._starting.setdefault(issuer, asyncio.Lock())
+        async with lock:
+            if issuer in self._tasks:
+                return
+
+            since = None if full else await self._since(issuer)
+            run, new = await API.start_run(
+                issuer,
+                mode='full' if since is None else 'incremental',
+                since=None if since is None else str(since),
+            )
+            # `resume` may have spawned the current run meanwhile
+            if issuer in self._tasks:
+                return
+
+            self._spawn(run)
+            if not new:
+                # Left by the previous process of the service
+                await self._inform(run, 'Resuming the interrupted run')
+
+    async def resume(self) -> None:
+        """Continue the runs interrupted by a restart of the service."""
+        for run in await API.fetch_runs(status='running'):
+            if run.issuer in self.parsers and run.issuer not in self._tasks:
+                logger.info(f'Resuming run {run.id} of {run.issuer}')
+                self._spawn(run)
+
+    async def close(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+manager = JobManager(PARSERS)
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, HTTPException
+
+from .manager import manager
+
+
+router = APIRouter()
+
+
+@router.post('/{issuer}/start/')
+async def start(issuer: str, full: bool = False):
+    """Start a run for the `issuer` now, unless it's already running.
+
+    A `full` run parses all the acts to detect the removed ones.
+    """
+    if issuer not in manager.parsers:
+        raise HTTPException(404, f'No parser for {issuer}')
+
+    await manager.start(issuer, full)
+    return {'running': sorted(manager.running)}
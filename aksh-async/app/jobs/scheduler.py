@@ -0,0 +1,86 @@
+import asyncio
+import datetime
+import logging
+# noinspection PyPep8Naming
+import typing as T
+
+import aiohttp
+
+from app.acts.parsers import ParserSpec
+from app.core.services import ServiceException
+from .manager import JobManager
+from .services import API
+
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Starts the runs of every issuer according to its `SCHEDULE`.
+
+    The issuers are run in parallel, the politeness of the parsers keeps
+    every source from being overloaded.
+    """
+
+    # Seconds to wait after failing to start a run
+    RETRY_DELAY = 300
+
+    def __init__(self, manager: JobManager):
+        self.manager = manager
+        self._tasks: T.List[asyncio.Task] = []
+
+    async def _seconds_until_due(self, spec: ParserSpec) -> float:
+        latest = await API.fetch_latest_runs(issuer=spec.issuer)
+        run = latest.get(spec.issuer)
+        if run is None:
+            return 0
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return (run.created + spec.schedule - now).total_seconds()
+
+    @staticmethod
+    async def _full_scan_due(spec: ParserSpec) -> bool:
+        latest = await API.fetch_latest_runs(
+            issuer=spec.issuer,
+            status='finished',
+            mode='full',
+        )
+        run = latest.get(spec.issuer)
+        if run is None:
+            return True
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return run.created + spec.full_scan_schedule <= now
+
+    async def _schedule(self, spec: ParserSpec) -> None:
+        while True:
+            try:
+                delay = await self._seconds_until_due(spec)
+                if delay <= 0:
+                    full = await self._full_scan_due(spec)
+                    await self.manager.start(spec.issuer, full)
+                    delay = spec.schedule.total_seconds()
+            except (
+                    ServiceException,
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+            ):
+                logger.exception(f'Error scheduling {spec.issuer}')
+                delay = self.RETRY_DELAY
+            except Exception:
+                # Nothing awaits the task before `close`, so it must not die
+                logger.exception(f'Unexpected error scheduling {spec.issuer}')
+                delay = self.RETRY_DELAY
+
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        for spec in self.manager.parsers.values():
+            if spec.schedule is not None:
+                self._tasks.append(asyncio.ensure_future(self._schedule(spec)))
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
@@ -0,0 +1,52 @@
+# noinspection PyPep8Naming
+import typing as T
+
+from app.core import services
+from .structures import Run
+
+
+class API(services.API):
+    @classmethod
+    async def start_run(cls, issuer: str, **data) -> T.Tuple[Run, bool]:
+        """Start a run for the `issuer`.
+
+        Returns the run and whether it's a new one: an issuer has only one
+        running run at a time, so the current one is returned if any.
+        """
+        response = await cls.post(
+            'jobs/runs/',
+            data={'issuer': issuer, **data},
+        )
+        if response.status not in (201, 409):
+            error_text = f'Error starting a run for {issuer} in {cls.URL}'
+            raise services.ServiceException(error_text)
+
+        return Run(**response.data), response.status == 201
+
+    @classmethod
+    async def fetch_runs(cls, **params) -> T.List[Run]:
+        response = await cls.get('jobs/runs/', params=params)
+        if not response.ok:
+            error_text = f'Error retrieving runs from {cls.URL}'
+            raise services.ServiceException(error_text)
+
+        return [Run(**r) for r in response.data]
+
+    @classmethod
+    async def fetch_latest_runs(cls, **params) -> T.Dict[str, Run]:
+        """Return the latest run of every issuer by the issuer."""
+        response = await cls.get('jobs/runs/latest/', params=params)
+        if not response.ok:
+            error_text = f'Error retrieving the latest runs from {cls.URL}'
+            raise services.ServiceException(error_text)
+
+        return {r['issuer']: Run(**r) for r in response.data}
+
+    @classmethod
+    async def change_run(cls, pk: int, /, **data) -> Run:
+        response = await cls.patch(f'jobs/runs/{pk}/', data=data)
+        if not response.ok:
+            error_text = f'Error changing run with pk={pk} in {cls.URL}'
+            raise services.ServiceException(error_text)
+
+        return Run(**response.data)
@@ -0,0 +1,28 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel
+
+
+# In the order they are run, should match `RUN_STAGES` of the `api` service
+STAGES = ('parse', 'store', 'download', 'forward')
+
+
+class Run(BaseModel):
+    id: int
+    issuer: str
+    status: str
+    mode: str
+    since: date = None
+    watermark: date = None
+    checkpoint: str = None
+    error: str = None
+    finished: datetime = None
+
+    created: datetime = None
+    updated: datetime = None
+
+    @property
+    def remaining_stages(self) -> tuple:
+        if self.checkpoint is None:
+            return STAGES
+        return STAGES[STAGES.index(self.checkpoint) + 1:]
@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from .manager import JobManager
+from .structures import Run
+
+
+class JobManagerTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.manager = JobManager({'Sumy': mock.Mock()})
+        self.run = Run(id=1, issuer='Sumy', status='running', mode='full')
+        self.started = []
+        self.executed = []
+        self.finish = asyncio.Event()
+
+        async def start_run(issuer, **_):
+            await asyncio.sleep(0.01)
+            self.started.append(issuer)
+            # Only the first request creates the run, as the `api` does
+            return self.run, len(self.started) == 1
+
+        async def execute(run):
+            self.executed.append(run.id)
+            await self.finish.wait()
+            del self.manager._tasks[run.issuer]
+
+        for patcher in (
+                mock.patch('app.jobs.manager.API.start_run', start_run),
+                mock.patch(
+                    'app.jobs.manager.API.fetch_runs',
+                    mock.AsyncMock(return_value=[self.run]),
+                ),
+                mock.patch.object(self.manager, '_execute', execute),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_concurrent_starts(self):
+        await asyncio.gather(
+            self.manager.start('Sumy', full=True),
+            self.manager.start('Sumy', full=True),
+        )
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.started, ['Sumy'])
+        self.assertEqual(self.executed, [1])
+
+        self.finish.set()
+        await asyncio.sleep(0)
+        self.assertEqual(self.manager.running, set())
+
+    async def test_start_while_resuming(self):
+        # The run is spawned by `resume` while `start` waits for the `api`
+        await asyncio.gather(
+            self.manager.start('Sumy', full=True),
+            self.manager.resume(),
+        )
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.executed, [1])
+        self.finish.set()
@@ -1,11 +1,70 @@
+import logging
+
+import aiohttp
 from fastapi import FastAPI
 
-from . import acts
+from . import acts, jobs
+from .acts import extraction
+from .core import metrics, services
+from .core.settings import RUN_SCHEDULER
+from .jobs.manager import manager
+from .jobs.scheduler import Scheduler
+
+
+logger = logging.getLogger(__name__)
 
 
 app = FastAPI()
 
 app.include_router(acts.routes.router, prefix='/acts')
+app.include_router(jobs.routes.router, prefix='/jobs')
 
 # Add websockets
 app.websocket('/acts/ws/')(acts.routes.ws)
+
+# Prometheus scrapes
+app.get('/metrics', include_in_schema=False)(metrics.endpoint)
+
+# Long-living connection pools of the services
+POOLED_SERVICES = (services.API, services.Interest)
+
+scheduler = Scheduler(manager)
+
+
+@app.on_event('startup')
+async def open_pools():
+    for service in POOLED_SERVICES:
+        await service.open_pool()
+
+
+@app.on_event('startup')
+async def resume_runs():
+    try:
+        await manager.resume()
+    except (services.ServiceException, aiohttp.ClientError):
+        # The `api` service may still be starting, the runs are resumed
+        # when their issuers are started again
+        logger.exception('Could not resume the interrupted runs')
+
+
+@app.on_event('startup')
+def start_scheduler():
+    if RUN_SCHEDULER:
+        scheduler.start()
+
+
+@app.on_event('shutdown')
+async def stop_runs():
+    await scheduler.close()
+    await manager.close()
+
+
+@app.on_event('shutdown')
+async def close_pools():
+    for service in POOLED_SERVICES:
+        await service.close_pool()
+
+
+@app.on_event('shutdown')
+def close_extraction_engine():
+    extraction.engine.close()
@@ -0,0 +1,102 @@
+"""Memory of the body of a forwarded act: streamed against built at once.
+
+The old way joined the texts, encoded them with base64 and dumped the
+whole JSON before sending it.
+
+    python -m benchmarks.forwarding --files 3 --size 20
+"""
+import argparse
+import asyncio
+import base64
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+# noinspection PyPep8Naming
+import typing as T
+
+from app.acts.services import FILES_SEPARATOR
+from app.core import json
+from app.core.services import Base64JSONPayload
+
+
+class Writer:
+    """Drops what is written, as a socket would, keeping only its end."""
+
+    def __init__(self):
+        self.size = 0
+        self.tail = b''
+
+    async def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        self.tail = (self.tail + chunk[-64:])[-64:]
+
+
+async def built(data: dict, parts: T.List[bytes], writer: Writer) -> None:
+    content = FILES_SEPARATOR.join(parts)
+    body = {**data, 'file_content': base64.b64encode(content).decode()}
+    await writer.write(json.dumps(body))
+
+
+async def streamed(data: dict, parts: T.List[bytes], writer: Writer) -> None:
+    payload = Base64JSONPayload(
+        data,
+        'file_content',
+        parts,
+        separator=FILES_SEPARATOR,
+    )
+    await payload.write(writer)
+    assert payload.size == writer.size
+
+
+def measure(
+        send: T.Callable[..., T.Awaitable[None]],
+        files: int,
+        size: int,
+) -> T.Tuple[float, int, Writer]:
+    """The seconds and the growth of RSS (bytes) to send the texts."""
+    data = {
+        'title': 'Про затвердження рішення № 1',
+        'link': 'https://smr.gov.ua/docs/1.pdf',
+        'file_name': '1.pdf.txt',
+    }
+    parts = [bytes(range(256)) * (size * 2 ** 12) for _ in range(files)]
+    writer = Writer()
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    asyncio.run(send(data, parts, writer))
+    duration = time.perf_counter() - start
+    # Kibibytes on Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss
+
+    return duration, rss * 1024, writer
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    argparser.add_argument('--files', type=int, default=3)
+    argparser.add_argument('--size', type=int, default=20, help='MiB a file')
+    args = argparser.parse_args()
+
+    print(f'{args.files} texts of {args.size} MiB')
+    writers = []
+    for send in (built, streamed):
+        # A process each, as the peak RSS of a process never goes down
+        with ProcessPoolExecutor(1) as executor:
+            duration, rss, writer = executor.submit(
+                measure,
+                send,
+                args.files,
+                args.size,
+            ).result()
+        writers.append((writer.size, writer.tail))
+        print(
+            f'  {send.__name__:<9} {duration * 1000:8.1f} ms, '
+            f'RSS grown by {rss / 2 ** 20:7.1f} MiB',
+        )
+
+    assert writers[0] == writers[1], 'The bodies differ'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""JSON of the services: `app.core.json` against the stdlib `json`.
+
+The stdlib side does what aiohttp did, `JsonPayload` to encode and
+`ClientResponse.json` to decode.
+
+    python -m benchmarks.json_codec --repeat 5
+"""
+import argparse
+import base64
+import json
+import os
+import time
+# noinspection PyPep8Naming
+import typing as T
+
+from app.core import json as codec
+from .structures import api_rows
+
+
+def payloads() -> T.Dict[str, T.Any]:
+    rows = api_rows(10_000)
+    return {
+        # A page of `fetch_acts`
+        'acts page': {'next': None, 'previous': None, 'results': rows[:1000]},
+        # The acts of a full sync
+        'sync': {
+            'issuer': 'Sumy',
+            'partial': False,
+            'acts': [
+                {
+                    'act_id': row['act_id'],
+                    'title': row['title'],
+                    'documents': [
+                        {'order': d['order'], 'url': d['url']}
+                        for d in row['documents']
+                    ],
+                }
+                for row in rows
+            ],
+        },
+        # An act forwarded with the extracted text of its documents
+        'forwarded act': {
+            'title': rows[0]['title'],
+            'link': rows[0]['documents'][0]['url'],
+            'file_name': 'document.pdf.txt',
+            'file_content': base64.b64encode(os.urandom(3 * 2 ** 20)).decode(),
+        },
+    }
+
+
+def stdlib_dumps(value: T.Any) -> bytes:
+    return json.dumps(value).encode('utf-8')
+
+
+def stdlib_loads(data: bytes) -> T.Any:
+    return json.loads(data.decode('utf-8'))
+
+
+def best_of(repeat: int, func: T.Callable[[], T.Any]) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    argparser.add_argument('--repeat', type=int, default=5)
+    args = argparser.parse_args()
+
+    backend = 'stdlib' if codec.orjson is None else 'orjson'
+    print(f'app.core.json uses {backend}, times in ms')
+    print(f'{"":<14} {"dumps":>17} {"loads":>17}')
+    print(f'{"":<14} {"stdlib":>8} {backend:>8} {"stdlib":>8} {backend:>8}')
+    for name, value in payloads().items():
+        data = stdlib_dumps(value)
+        assert codec.loads(codec.dumps(value)) == value
+        times = (
+            best_of(args.repeat, lambda: stdlib_dumps(value)),
+            best_of(args.repeat, lambda: codec.dumps(value)),
+            best_of(args.repeat, lambda: stdlib_loads(data)),
+            best_of(args.repeat, lambda: codec.loads(data)),
+        )
+        print(f'{name:<14}', *(f'{t:8.1f}' for t in times))
+
+
+if __name__ == '__main__':
+    main()
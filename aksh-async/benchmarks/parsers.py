@@ -0,0 +1,144 @@
+"""Parsing of the acts pages: the `pages` helper against the old way.
+
+The old way decoded the page to `str`, parsed it from a `StringIO` and
+evaluated the XPaths of the cells anew for every row. The streamed pages
+are also parsed as a whole tree, which is faster but takes several times
+the memory.
+
+    python -m benchmarks.parsers --issuer Dnipro saved-page.html
+    python -m benchmarks.parsers --rows 20000
+
+Without the saved pages a synthetic one of `--rows` acts is generated.
+"""
+import argparse
+import pathlib
+import time
+from io import StringIO
+# noinspection PyPep8Naming
+import typing as T
+
+from lxml import etree
+
+from app.acts.parsers import dnipro, sumy
+from app.acts.parsers.pages import RowsParser
+
+PARSERS = {
+    'Dnipro': dnipro.ROWS,
+    'Sumy': sumy.ROWS,
+}
+# The XPaths of the old parsers, evaluated without being compiled
+LEGACY_ROWS = {
+    'Dnipro': '/html/body/div[2]/table/tbody/tr',
+    'Sumy': sumy.XPATH,
+}
+LEGACY_CELLS = {
+    'Dnipro': {
+        'act_id': './td[2]/text()',
+        'title': './td[5]/text()',
+        'download_pdf': './td[6]/button/@onclick',
+        'download_doc': './td[7]/button/@onclick',
+    },
+    'Sumy': {
+        'act_id': './td[1]/text()',
+        'title': './td[2]//text()',
+        'uris': './td[2]//@href',
+    },
+}
+
+
+def dnipro_page(rows: int) -> bytes:
+    html = ''.join(
+        f'<tr><td>{i}</td><td> {i}-ОД </td><td></td><td></td>'
+        f'<td>Про затвердження рішення № {i}</td>'
+        f'<td><button onclick="download(\'/docs/{i}.pdf\')"></button></td>'
+        f'<td><button onclick="download(\'/docs/{i}.doc\')"></button></td>'
+        f'</tr>'
+        for i in range(rows)
+    )
+    return (
+        f'<html><body><div></div><div><table><tbody>{html}</tbody>'
+        f'</table></div></body></html>'
+    ).encode()
+
+
+def sumy_page(rows: int) -> bytes:
+    html = '<tr><td>№</td><td>Назва</td></tr>' + ''.join(
+        f'<tr><td>{i}</td>'
+        f'<td><a href="/docs/{i}.pdf">Про рішення № {i}</a></td></tr>'
+        for i in range(rows)
+    )
+    html = f'<table><tbody>{html}</tbody></table>'
+    # The page layout leading to the table of the acts
+    path = sumy.XPATH.split('/table')[0].strip('/').split('/')
+    for step in reversed(path[2:]):
+        tag, _, position = step.rstrip(']').partition('[')
+        html = f'<{tag}></{tag}>' * (int(position or 1) - 1) + \
+            f'<{tag}>{html}</{tag}>'
+    return f'<html><body>{html}</body></html>'.encode()
+
+
+def legacy_parse(issuer: str, content: bytes) -> T.List[dict]:
+    tree = etree.parse(StringIO(content.decode()), etree.HTMLParser())
+    return [
+        {name: row.xpath(xpath) for name, xpath in
+         LEGACY_CELLS[issuer].items()}
+        for row in tree.xpath(LEGACY_ROWS[issuer])
+    ]
+
+
+def measure(
+        name: str,
+        parse: T.Callable[[bytes], T.List[dict]],
+        content: bytes,
+        repeat: int,
+) -> T.List[dict]:
+    best = float('inf')
+    rows = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = parse(content)
+        best = min(best, time.perf_counter() - start)
+
+    print(f'  {name:<8} {best * 1000:9.1f} ms  {len(rows)} rows')
+    return rows
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    argparser.add_argument('pages', nargs='*', type=pathlib.Path)
+    argparser.add_argument('--issuer', choices=PARSERS)
+    argparser.add_argument('--rows', type=int, default=5000)
+    argparser.add_argument('--repeat', type=int, default=5)
+    args = argparser.parse_args()
+
+    if args.pages:
+        if args.issuer is None:
+            argparser.error('--issuer is required for the saved pages')
+        pages = [
+            (args.issuer, str(path), path.read_bytes())
+            for path in args.pages
+        ]
+    else:
+        pages = [
+            ('Dnipro', 'synthetic', dnipro_page(args.rows)),
+            ('Sumy', 'synthetic', sumy_page(args.rows)),
+        ]
+
+    for issuer, name, content in pages:
+        print(f'{issuer} {name} ({len(content) // 1024} KiB)')
+        expected = measure(
+            'legacy',
+            lambda page: legacy_parse(issuer, page),
+            content,
+            args.repeat,
+        )
+        rows = measure('pages', PARSERS[issuer].parse, content, args.repeat)
+        if PARSERS[issuer].rows is None:
+            # The whole tree of a streamed page, to compare with
+            tree = RowsParser(LEGACY_CELLS[issuer], LEGACY_ROWS[issuer])
+            measure('tree', tree.parse, content, args.repeat)
+        assert rows == expected, 'The rows differ from the legacy ones'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""The acts structures against the pydantic models they replaced.
+
+Builds the acts from rows shaped like the `api` responses, dumps them back
+as for a sync, and measures the memory they hold.
+
+    python -m benchmarks.structures --acts 100000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+# noinspection PyPep8Naming
+import typing as T
+
+from pydantic import BaseModel
+
+from app.acts.structures import Act
+
+
+class PydanticDocument(BaseModel):
+    order: str
+    url: str
+
+    act: int = None
+    file: str = None
+    last_modified: datetime = None
+    etag: str = None
+    sha256: str = None
+
+    id: int = None
+    created: datetime = None
+    updated: datetime = None
+
+
+class PydanticAct(BaseModel):
+    issuer: str
+    act_id: str
+    title: str
+    documents: T.List[PydanticDocument]
+
+    forwarded: bool = False
+    removed_from_source: bool = False
+    needs_inspection: bool = False
+    comments: str = None
+
+    id: int = None
+    created: datetime = None
+    updated: datetime = None
+
+
+def api_rows(acts: int) -> T.List[dict]:
+    timestamp = '2021-05-17T10:42:13.512345Z'
+    return [
+        {
+            'id': i,
+            'issuer': 'Sumy',
+            'act_id': f'{i}-МР',
+            'title': f'Про затвердження рішення № {i}',
+            'forwarded': False,
+            'removed_from_source': False,
+            'needs_inspection': False,
+            'comments': None,
+            'created': timestamp,
+            'updated': timestamp,
+            'documents': [
+                {
+                    'id': i * 2 + order,
+                    'act': i,
+                    'order': order,
+                    'url': f'https://smr.gov.ua/docs/{i}-{order}.pdf',
+                    'file': f'acts/Sumy/{i}-{order}.pdf',
+                    'last_modified': timestamp,
+                    'etag': f'"{i}-{order}"',
+                    'sha256': f'{i:064x}',
+                    'created': timestamp,
+                    'updated': timestamp,
+                }
+                for order in range(2)
+            ],
+        }
+        for i in range(acts)
+    ]
+
+
+def measure(
+        name: str,
+        func: T.Callable[[], T.Any],
+        memory: bool = False,
+) -> T.Any:
+    start = time.perf_counter()
+    result = func()
+    line = f'  {name:<10} {(time.perf_counter() - start) * 1000:9.1f} ms'
+
+    if memory:
+        # Traced apart, as tracing slows down the allocations
+        del result
+        tracemalloc.start()
+        result = func()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        line += f' {size / 2 ** 20:8.1f} MiB'
+
+    print(line)
+    return result
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    argparser.add_argument('--acts', type=int, default=100_000)
+    args = argparser.parse_args()
+
+    rows = api_rows(args.acts)
+
+    print(f'Building {args.acts} acts (time, memory held)')
+    models = measure(
+        'pydantic',
+        lambda: [PydanticAct(**a) for a in rows],
+        memory=True,
+    )
+    acts = measure(
+        'dataclass',
+        lambda: [Act.from_dict(a) for a in rows],
+        memory=True,
+    )
+
+    print('Dumping them for a sync')
+    include = {
+        'act_id': ...,
+        'title': ...,
+        'documents': {'__all__': {'order', 'url'}},
+    }
+    measure('pydantic', lambda: [
+        model.dict(include=include)
+        for model in models
+    ])
+    measure('dataclass', lambda: [
+        act.to_dict(('act_id', 'title', 'documents'), ('order', 'url'))
+        for act in acts
+    ])
+
+
+if __name__ == '__main__':
+    main()